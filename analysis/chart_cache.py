@@ -0,0 +1,113 @@
+import os
+import json
+import hashlib
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+# 每种输出规格对应的保存参数
+RENDER_VARIANTS = {
+    'full': {'format': 'png', 'dpi': 100},
+    'thumbnail': {'format': 'png', 'dpi': 16},
+    'svg': {'format': 'svg'},
+}
+
+# 绘图代码变化时递增，使旧的缓存全部失效
+RENDER_VERSION = 2
+
+class ChartCache:
+    """On-disk cache of rendered analysis charts.
+
+    Entries live under ``<cache_dir>/<city>/<fingerprint>_<variant>.<ext>``.
+    The fingerprint hashes the city's data together with the rendering
+    options, so a chart is only re-rendered when one of them changes; files
+    with an outdated fingerprint are removed when a new one is stored.
+    """
+
+    def __init__(self, cache_dir=None):
+        if cache_dir is None:
+            cache_dir = Path(__file__).parent / 'cache'
+        self.cache_dir = Path(cache_dir)
+
+    def fingerprint(self, weather_data, options=None, columns=None):
+        """Hash the city's data (only ``columns`` if given) and the rendering options
+
+        Columns are hashed with fixed types (dates as int64 nanoseconds,
+        numbers as float64, anything else as str), so the same values give
+        the same fingerprint whichever dtypes the frame was loaded with.
+        """
+        import pandas as pd
+        columns = list(weather_data.columns if columns is None else columns)
+        normalized = {}
+        for column in columns:
+            series = weather_data[column]
+            if pd.api.types.is_datetime64_any_dtype(series):
+                values = series.to_numpy(dtype='datetime64[ns]').view('int64')
+            elif pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+                values = series.to_numpy(dtype='float64', na_value=np.nan)
+            else:
+                values = series.astype('str').to_numpy()
+            normalized[column] = values
+        digest = hashlib.sha1()
+        row_hashes = pd.util.hash_pandas_object(pd.DataFrame(normalized), index=False).values
+        digest.update(row_hashes.tobytes())
+        digest.update(','.join(map(str, columns)).encode('utf-8'))
+        payload = {'version': RENDER_VERSION, 'options': options or {}}
+        digest.update(json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    def path_for(self, key, fingerprint, variant):
+        """Path of a cached chart variant"""
+        ext = RENDER_VARIANTS[variant]['format']
+        return self.cache_dir / key / f'{fingerprint}_{variant}.{ext}'
+
+    def get(self, key, fingerprint, variants=('full',)):
+        """Return cached paths for all variants, or None if any is missing"""
+        paths = {variant: self.path_for(key, fingerprint, variant) for variant in variants}
+        if all(path.exists() for path in paths.values()):
+            # 记录最近使用时间，供 prune 按 LRU 淘汰
+            os.utime(self.cache_dir / key)
+            return paths
+        return None
+
+    def store(self, key, fingerprint, figure, variants=('full',), **savefig_kwargs):
+        """Save a rendered figure in the requested variants and drop stale entries"""
+        entry_dir = self.cache_dir / key
+        entry_dir.mkdir(parents=True, exist_ok=True)
+
+        for stale in entry_dir.iterdir():
+            if stale.is_file() and not stale.name.startswith(f'{fingerprint}_'):
+                stale.unlink()
+
+        paths = {}
+        for variant in variants:
+            path = self.path_for(key, fingerprint, variant)
+            # 先写临时文件再替换，避免并发读取到半成品
+            tmp_path = path.with_name(f'.{path.name}.tmp')
+            figure.savefig(tmp_path, **RENDER_VARIANTS[variant], **savefig_kwargs)
+            tmp_path.replace(path)
+            paths[variant] = path
+        return paths
+
+    def prune(self, max_entries):
+        """Remove the least recently used entries beyond ``max_entries``"""
+        if not self.cache_dir.exists():
+            return []
+        entries = sorted(
+            (entry for entry in self.cache_dir.iterdir() if entry.is_dir()),
+            key=lambda entry: entry.stat().st_mtime_ns,
+            reverse=True
+        )
+        removed = entries[max_entries:]
+        for entry in removed:
+            shutil.rmtree(entry, ignore_errors=True)
+        return [entry.name for entry in removed]
+
+    def export(self, cached_path, output_path):
+        """Copy a cached chart to a public location if it is out of date"""
+        output_path = Path(output_path)
+        if (not output_path.exists()
+                or output_path.stat().st_mtime_ns < cached_path.stat().st_mtime_ns):
+            shutil.copyfile(cached_path, output_path)
+        return output_path
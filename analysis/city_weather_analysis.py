@@ -1,247 +1,414 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from pathlib import Path
-import numpy as np
-
-class WeatherAnalyzer:
-    def __init__(self, city_name):
-        self.base_dir = Path(__file__).parent.parent
-        self.data_path = self.base_dir / 'database' / 'daily_data.csv'
-        self.city_name = city_name
-        
-        self.colors = {
-            'primary': '#1890ff',
-            'secondary': '#40a9ff',
-            'success': '#52c41a',
-            'warning': '#faad14',
-            'danger': '#f5222d',
-            'background': '#001529',
-            'text': '#ffffff'
-        }
-        
-        plt.rcParams['font.sans-serif'] = ['SimHei']
-        plt.rcParams['axes.unicode_minus'] = False
-        plt.style.use('dark_background')
-        
-    def load_data(self):
-        """加载并预处理数据"""
-        try:
-            df = pd.read_csv(self.data_path)
-            self.weather_data = df[df['城市'] == self.city_name].copy()
-            if self.weather_data.empty:
-                raise ValueError(f"未找到{self.city_name}的天气数据")
-            
-            self.weather_data['日期'] = pd.to_datetime(self.weather_data['日期'])
-            self.weather_data['平均温度'] = (self.weather_data['最高温'] + self.weather_data['最低温']) / 2
-            self.weather_data['空气质量指数'] = self.weather_data['空气质量指数'].str.extract('(\d+)').astype(float)
-            
-            comfort_map = {
-                '较冷': 2,
-                '舒适': 5,
-                '较热': 3
-            }
-            self.weather_data['舒适度'] = self.weather_data['舒适度'].map(comfort_map)
-            
-            print(f"成功加载{self.city_name}的天气数据，共{len(self.weather_data)}条记录")
-        except Exception as e:
-            print(f"数据加载失败: {e}")
-            raise
-        
-    def create_analysis(self):
-        """生成所有分析图表"""
-        self.load_data()
-        
-        fig = plt.figure(figsize=(20, 20))
-        fig.suptitle(f'{self.city_name}天气数据综合分析', fontsize=16, color=self.colors['text'])
-        
-        # 1. 温度变化趋势
-        ax1 = plt.subplot(321)
-        self.plot_temperature_trends(ax1)
-        
-        # 2. 舒适度日历图
-        ax2 = plt.subplot(322)
-        self.plot_comfort_calendar(ax2)
-        
-        # 3. 风向玫瑰图
-        ax3 = plt.subplot(323, projection='polar')
-        self.plot_wind_rose(ax3)
-        
-        # 4. 月度舒适天数统计
-        ax4 = plt.subplot(324)
-        self.plot_monthly_stats(ax4)
-        
-        # 5. 温度分布
-        ax5 = plt.subplot(325)
-        self.plot_temperature_distribution(ax5)
-        
-        # 6. 空气质量时间序列
-        ax6 = plt.subplot(326)
-        self.plot_aqi_timeline(ax6)
-        
-        plt.tight_layout(rect=[0, 0.03, 1, 0.95])
-        
-        output_path = self.base_dir / 'analysis' / f'{self.city_name}_weather_analysis.png'
-        plt.savefig(output_path, bbox_inches='tight', facecolor=self.colors['background'])
-        print(f"分析图表已保存至: {output_path}")
-        plt.close()
-        
-    def plot_temperature_trends(self, ax):
-        """温度变化趋势"""
-        ax.plot(self.weather_data['日期'], self.weather_data['最高温'], 
-                color=self.colors['danger'], label='最高温')
-        ax.plot(self.weather_data['日期'], self.weather_data['最低温'], 
-                color=self.colors['primary'], label='最低温')
-        ax.fill_between(self.weather_data['日期'], 
-                       self.weather_data['最高温'], 
-                       self.weather_data['最低温'], 
-                       alpha=0.2, color=self.colors['secondary'])
-        
-        comfort_days = self.weather_data[self.weather_data['舒适度'] == 5]
-        if not comfort_days.empty:
-            ax.fill_between(comfort_days['日期'],
-                           comfort_days['最高温'],
-                           comfort_days['最低温'],
-                           color=self.colors['success'],
-                           alpha=0.3,
-                           label='舒适区间')
-            
-            ax.scatter(comfort_days['日期'], 
-                      [ax.get_ylim()[0]] * len(comfort_days),
-                      color=self.colors['success'],
-                      marker='|',
-                      s=100,
-                      zorder=3)
-        
-        ax.set_title('全年温度变化趋势', color=self.colors['text'])
-        ax.set_xlabel('日期', color=self.colors['text'])
-        ax.set_ylabel('温度 (°C)', color=self.colors['text'])
-        ax.tick_params(colors=self.colors['text'])
-        
-        ax.legend(facecolor=self.colors['background'], 
-                 labelcolor=self.colors['text'],
-                 loc='upper right')
-        
-        for spine in ax.spines.values():
-            spine.set_color(self.colors['text'])
-        
-    def plot_comfort_calendar(self, ax):
-        """舒适度日历热力图"""
-        calendar_data = self.weather_data.set_index('日期')['舒适度'].to_frame()
-        
-        comfort_pivot = calendar_data.pivot_table(
-            index=calendar_data.index.month,
-            columns=calendar_data.index.day,
-            values='舒适度'
-        )
-        
-        colors = {
-            2: self.colors['primary'],   # 较冷 - 蓝色
-            5: self.colors['success'],   # 舒适 - 绿色
-            3: self.colors['warning']    # 较热 - 橙色
-        }
-        
-        cmap = plt.matplotlib.colors.ListedColormap([colors[2], colors[3], colors[5]])
-        
-        heatmap = sns.heatmap(comfort_pivot, 
-                             ax=ax,
-                             cmap=cmap,
-                             cbar_kws={'label': '舒适度'})
-        
-        colorbar = heatmap.collections[0].colorbar
-        colorbar.set_ticks([0.33, 1, 1.67])
-        colorbar.set_ticklabels(['较冷', '较热', '舒适'])
-        
-        ax.set_title('全年舒适度日历', color=self.colors['text'])
-        ax.set_xlabel('日', color=self.colors['text'])
-        ax.set_ylabel('月', color=self.colors['text'])
-        
-        ax.tick_params(colors=self.colors['text'])
-        colorbar.ax.tick_params(colors=self.colors['text'])
-        colorbar.ax.yaxis.label.set_color(self.colors['text'])
-        
-        for spine in ax.spines.values():
-            spine.set_color(self.colors['text'])
-        
-    def plot_wind_rose(self, ax):
-        """风向玫瑰图"""
-        wind_counts = self.weather_data['风向'].value_counts()
-        angles = np.linspace(0, 2*np.pi, len(wind_counts), endpoint=False)
-        
-        ax.bar(angles, wind_counts.values, width=0.35,
-               color=self.colors['primary'], alpha=0.5)
-        ax.set_xticks(angles)
-        ax.set_xticklabels(wind_counts.index, color=self.colors['text'])
-        ax.set_title('风向频率分布', color=self.colors['text'])
-        ax.tick_params(colors=self.colors['text'])
-        for spine in ax.spines.values():
-            spine.set_color(self.colors['text'])
-        
-    def plot_monthly_stats(self, ax):
-        """月度舒适天数统计"""
-        comfort_mask = (self.weather_data['舒适度'] == 5)
-        
-        monthly_comfort = self.weather_data[comfort_mask].groupby(
-            self.weather_data[comfort_mask]['日期'].dt.strftime('%Y-%m')
-        ).size()
-        
-        ax.bar(range(len(monthly_comfort)), monthly_comfort.values, 
-               color=self.colors['primary'], width=0.4)
-        
-        ax.set_xticks(range(len(monthly_comfort)))
-        ax.set_xticklabels(monthly_comfort.index, rotation=45, color=self.colors['text'])
-        
-        for i, v in enumerate(monthly_comfort.values):
-            ax.text(i, v + 0.5, str(v), 
-                    ha='center', va='bottom', 
-                    color=self.colors['text'])
-        
-        ax.set_title('月度舒适天数统计', color=self.colors['text'])
-        ax.set_xlabel('月份', color=self.colors['text'])
-        ax.set_ylabel('舒适天数', color=self.colors['text'])
-        ax.tick_params(colors=self.colors['text'])
-        
-        for spine in ax.spines.values():
-            spine.set_color(self.colors['text'])
-        
-    def plot_temperature_distribution(self, ax):
-        """温度分布"""
-        sns.kdeplot(data=self.weather_data, x='最高温', ax=ax, 
-                   color=self.colors['danger'], label='最高温',
-                   fill=True, alpha=0.3)
-        sns.kdeplot(data=self.weather_data, x='最低温', ax=ax, 
-                   color=self.colors['primary'], label='最低温',
-                   fill=True, alpha=0.3)
-        
-        ax.axvline(self.weather_data['最高温'].mean(), 
-                   color=self.colors['danger'], linestyle='--', alpha=0.8,
-                   label=f'平均最高温: {self.weather_data["最高温"].mean():.1f}°C')
-        ax.axvline(self.weather_data['最低温'].mean(), 
-                   color=self.colors['primary'], linestyle='--', alpha=0.8,
-                   label=f'平均最低温: {self.weather_data["最低温"].mean():.1f}°C')
-        
-        ax.set_title('温度分布密度', color=self.colors['text'])
-        ax.set_xlabel('温度 (°C)', color=self.colors['text'])
-        ax.set_ylabel('密度', color=self.colors['text'])
-        ax.tick_params(colors=self.colors['text'])
-        
-        ax.legend(facecolor=self.colors['background'], 
-                 labelcolor=self.colors['text'],
-                 loc='upper right')
-        
-        for spine in ax.spines.values():
-            spine.set_color(self.colors['text'])
-        
-    def plot_aqi_timeline(self, ax):
-        """空气质量时间序列"""
-        ax.plot(self.weather_data['日期'], self.weather_data['空气质量指数'], 
-                color=self.colors['warning'])
-        ax.set_title('空气质量指数变化')
-
-if __name__ == "__main__":
-    city_name = input("请输入城市名称（例如：北京市、上海市、广州市）：")
-    try:
-        analyzer = WeatherAnalyzer(city_name)
-        analyzer.create_analysis()
-    except Exception as e:
-        print(f"分析失败: {e}") 
\ No newline at end of file
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import numpy as np
+
+BASE_DIR = Path(__file__).parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from processor.process_city_index import CityIndexProcessor
+from analysis.chart_cache import ChartCache
+from analysis.render_primitives import binned_kde, calendar_matrix, downsample_indices
+
+class WeatherAnalyzer:
+    # 可单独渲染的面板: 名称 -> (绘图方法, 坐标投影)
+    PANELS = {
+        'temperature_trends': ('plot_temperature_trends', None),
+        'comfort_calendar': ('plot_comfort_calendar', None),
+        'wind_rose': ('plot_wind_rose', 'polar'),
+        'monthly_stats': ('plot_monthly_stats', None),
+        'temperature_distribution': ('plot_temperature_distribution', None),
+        'aqi_timeline': ('plot_aqi_timeline', None),
+    }
+
+    # 图表实际绘制的列；缓存指纹只基于这些列计算
+    PLOTTED_COLUMNS = ['日期', '最高温', '最低温', '空气质量指数', '风向', '舒适度']
+
+    def __init__(self, city_name, weather_data=None):
+        self.base_dir = BASE_DIR
+        self.data_path = self.base_dir / 'database' / 'daily_data.csv'
+        self.city_name = city_name
+        self.city_index = CityIndexProcessor()
+        # 批量模式下由调用方传入已解析的城市数据，避免重复读取
+        self.preloaded_data = weather_data
+        self.chart_cache = ChartCache(self.base_dir / 'analysis' / 'cache')
+        
+        self.colors = {
+            'primary': '#1890ff',
+            'secondary': '#40a9ff',
+            'success': '#52c41a',
+            'warning': '#faad14',
+            'danger': '#f5222d',
+            'background': '#001529',
+            'text': '#ffffff'
+        }
+        
+        # 参与缓存指纹计算的渲染参数
+        self.render_options = {
+            'figsize': (20, 20),
+            'style': 'dark_background',
+            'colors': self.colors,
+            # 折线图的最大点数，超出时按LTTB降采样
+            'max_points': 1000
+        }
+        
+    def style_context(self):
+        """绘图样式只在渲染期间生效，不修改全局 rcParams"""
+        import matplotlib.pyplot as plt
+        return plt.style.context([
+            self.render_options['style'],
+            {'font.sans-serif': ['SimHei'], 'axes.unicode_minus': False}
+        ])
+        
+    def load_data(self):
+        """加载并预处理数据"""
+        try:
+            # 城市索引中的日期与空气质量指数已预先解析
+            if self.preloaded_data is not None:
+                self.weather_data = self.preloaded_data.copy()
+            else:
+                self.weather_data = self.city_index.load_city(self.city_name)
+            if self.weather_data.empty:
+                raise ValueError(f"未找到{self.city_name}的天气数据")
+            # 增量处理后的分区不保证按日期排列，折线图与降采样均需有序数据
+            self.weather_data = self.weather_data.sort_values('日期', kind='stable', ignore_index=True)
+            
+            comfort_map = {
+                '较冷': 2,
+                '舒适': 5,
+                '较热': 3
+            }
+            self.weather_data['舒适度'] = self.weather_data['舒适度'].map(comfort_map)
+            
+            print(f"成功加载{self.city_name}的天气数据，共{len(self.weather_data)}条记录")
+        except Exception as e:
+            print(f"数据加载失败: {e}")
+            raise
+        
+    def create_analysis(self, variants=('full',), use_cache=True):
+        """生成所有分析图表"""
+        self.load_data()
+        
+        output_path = self.base_dir / 'analysis' / f'{self.city_name}_weather_analysis.png'
+        fingerprint = self.chart_cache.fingerprint(self.weather_data, self.render_options, self.PLOTTED_COLUMNS)
+        if use_cache:
+            cached = self.chart_cache.get(self.city_name, fingerprint, variants)
+            if cached is not None:
+                if 'full' in cached:
+                    self.chart_cache.export(cached['full'], output_path)
+                print(f"{self.city_name}的数据未变化，使用缓存图表")
+                return cached
+        
+        import matplotlib.pyplot as plt
+
+        with self.style_context():
+            fig = plt.figure(figsize=self.render_options['figsize'])
+            fig.suptitle(f'{self.city_name}天气数据综合分析', fontsize=16, color=self.colors['text'])
+        
+            # 1. 温度变化趋势
+            ax1 = plt.subplot(321)
+            self.plot_temperature_trends(ax1)
+        
+            # 2. 舒适度日历图
+            ax2 = plt.subplot(322)
+            self.plot_comfort_calendar(ax2)
+        
+            # 3. 风向玫瑰图
+            ax3 = plt.subplot(323, projection='polar')
+            self.plot_wind_rose(ax3)
+        
+            # 4. 月度舒适天数统计
+            ax4 = plt.subplot(324)
+            self.plot_monthly_stats(ax4)
+        
+            # 5. 温度分布
+            ax5 = plt.subplot(325)
+            self.plot_temperature_distribution(ax5)
+        
+            # 6. 空气质量时间序列
+            ax6 = plt.subplot(326)
+            self.plot_aqi_timeline(ax6)
+        
+            plt.tight_layout(rect=[0, 0.03, 1, 0.95])
+        
+            paths = self.chart_cache.store(self.city_name, fingerprint, fig, variants,
+                                           bbox_inches='tight', facecolor=self.colors['background'])
+            plt.close(fig)
+        
+        if 'full' in paths:
+            self.chart_cache.export(paths['full'], output_path)
+            print(f"分析图表已保存至: {output_path}")
+        return paths
+        
+    def create_panel(self, panel, variants=('full',), use_cache=True):
+        """生成单个分析面板"""
+        if panel not in self.PANELS:
+            raise ValueError(f"未知的分析面板: {panel}")
+        self.load_data()
+        
+        options = {**self.render_options, 'figsize': (10, 7), 'panel': panel}
+        cache_key = f'{self.city_name}_{panel}'
+        fingerprint = self.chart_cache.fingerprint(self.weather_data, options, self.PLOTTED_COLUMNS)
+        if use_cache:
+            cached = self.chart_cache.get(cache_key, fingerprint, variants)
+            if cached is not None:
+                return cached
+        
+        import matplotlib.pyplot as plt
+        
+        method_name, projection = self.PANELS[panel]
+        with self.style_context():
+            fig = plt.figure(figsize=options['figsize'])
+            ax = fig.add_subplot(111, projection=projection)
+            getattr(self, method_name)(ax)
+            fig.tight_layout()
+            
+            paths = self.chart_cache.store(cache_key, fingerprint, fig, variants,
+                                           bbox_inches='tight', facecolor=self.colors['background'])
+            plt.close(fig)
+        return paths
+        
+    def downsampled(self, *columns):
+        """降采样到 max_points 后保留的行（多列时取各列保留点的并集）"""
+        if len(self.weather_data) <= self.render_options['max_points']:
+            return self.weather_data
+        dates = self.weather_data['日期'].to_numpy()
+        positions = np.unique(np.concatenate([
+            downsample_indices(dates, self.weather_data[column].to_numpy(dtype=float),
+                               self.render_options['max_points'])
+            for column in columns
+        ]))
+        return self.weather_data.iloc[positions]
+        
+    def plot_temperature_trends(self, ax):
+        """温度变化趋势"""
+        series = self.downsampled('最高温', '最低温')
+        ax.plot(series['日期'], series['最高温'], 
+                color=self.colors['danger'], label='最高温')
+        ax.plot(series['日期'], series['最低温'], 
+                color=self.colors['primary'], label='最低温')
+        ax.fill_between(series['日期'], 
+                       series['最高温'], 
+                       series['最低温'], 
+                       alpha=0.2, color=self.colors['secondary'])
+        
+        comfort_days = self.weather_data[self.weather_data['舒适度'] == 5]
+        if not comfort_days.empty:
+            ax.fill_between(comfort_days['日期'],
+                           comfort_days['最高温'],
+                           comfort_days['最低温'],
+                           color=self.colors['success'],
+                           alpha=0.3,
+                           label='舒适区间')
+            
+            ax.scatter(comfort_days['日期'], 
+                      [ax.get_ylim()[0]] * len(comfort_days),
+                      color=self.colors['success'],
+                      marker='|',
+                      s=100,
+                      zorder=3)
+        
+        ax.set_title('全年温度变化趋势', color=self.colors['text'])
+        ax.set_xlabel('日期', color=self.colors['text'])
+        ax.set_ylabel('温度 (°C)', color=self.colors['text'])
+        ax.tick_params(colors=self.colors['text'])
+        
+        ax.legend(facecolor=self.colors['background'], 
+                 labelcolor=self.colors['text'],
+                 loc='upper right')
+        
+        for spine in ax.spines.values():
+            spine.set_color(self.colors['text'])
+        
+    def plot_comfort_calendar(self, ax):
+        """舒适度日历热力图"""
+        from matplotlib.colors import ListedColormap, BoundaryNorm
+        
+        comfort_matrix = calendar_matrix(self.weather_data['日期'].values,
+                                         self.weather_data['舒适度'].values)
+        
+        colors = {
+            2: self.colors['primary'],   # 较冷 - 蓝色
+            5: self.colors['success'],   # 舒适 - 绿色
+            3: self.colors['warning']    # 较热 - 橙色
+        }
+        
+        cmap = ListedColormap([colors[2], colors[3], colors[5]])
+        norm = BoundaryNorm([1.5, 2.5, 4, 5.5], cmap.N)
+        
+        image = ax.imshow(np.ma.masked_invalid(comfort_matrix),
+                          cmap=cmap, norm=norm,
+                          aspect='auto', interpolation='nearest',
+                          extent=(0.5, 31.5, 12.5, 0.5))
+        ax.set_xticks(range(1, 32))
+        ax.set_yticks(range(1, 13))
+        
+        colorbar = ax.figure.colorbar(image, ax=ax, label='舒适度')
+        colorbar.set_ticks([2, 3.25, 4.75])
+        colorbar.set_ticklabels(['较冷', '较热', '舒适'])
+        
+        ax.set_title('全年舒适度日历', color=self.colors['text'])
+        ax.set_xlabel('日', color=self.colors['text'])
+        ax.set_ylabel('月', color=self.colors['text'])
+        
+        ax.tick_params(colors=self.colors['text'])
+        colorbar.ax.tick_params(colors=self.colors['text'])
+        colorbar.ax.yaxis.label.set_color(self.colors['text'])
+        
+        for spine in ax.spines.values():
+            spine.set_color(self.colors['text'])
+        
+    def plot_wind_rose(self, ax):
+        """风向玫瑰图"""
+        wind_counts = self.weather_data['风向'].value_counts()
+        angles = np.linspace(0, 2*np.pi, len(wind_counts), endpoint=False)
+        
+        ax.bar(angles, wind_counts.values, width=0.35,
+               color=self.colors['primary'], alpha=0.5)
+        ax.set_xticks(angles)
+        ax.set_xticklabels(wind_counts.index, color=self.colors['text'])
+        ax.set_title('风向频率分布', color=self.colors['text'])
+        ax.tick_params(colors=self.colors['text'])
+        for spine in ax.spines.values():
+            spine.set_color(self.colors['text'])
+        
+    def plot_monthly_stats(self, ax):
+        """月度舒适天数统计"""
+        comfort_mask = (self.weather_data['舒适度'] == 5)
+        
+        monthly_comfort = self.weather_data[comfort_mask].groupby(
+            self.weather_data[comfort_mask]['日期'].dt.strftime('%Y-%m')
+        ).size()
+        
+        ax.bar(range(len(monthly_comfort)), monthly_comfort.values, 
+               color=self.colors['primary'], width=0.4)
+        
+        ax.set_xticks(range(len(monthly_comfort)))
+        ax.set_xticklabels(monthly_comfort.index, rotation=45, color=self.colors['text'])
+        
+        for i, v in enumerate(monthly_comfort.values):
+            ax.text(i, v + 0.5, str(v), 
+                    ha='center', va='bottom', 
+                    color=self.colors['text'])
+        
+        ax.set_title('月度舒适天数统计', color=self.colors['text'])
+        ax.set_xlabel('月份', color=self.colors['text'])
+        ax.set_ylabel('舒适天数', color=self.colors['text'])
+        ax.tick_params(colors=self.colors['text'])
+        
+        for spine in ax.spines.values():
+            spine.set_color(self.colors['text'])
+        
+    def plot_temperature_distribution(self, ax):
+        """温度分布"""
+        for column, color in (('最高温', self.colors['danger']),
+                              ('最低温', self.colors['primary'])):
+            grid, density = binned_kde(self.weather_data[column].values)
+            ax.plot(grid, density, color=color)
+            ax.fill_between(grid, density, color=color, alpha=0.3, label=column)
+        
+        ax.axvline(self.weather_data['最高温'].mean(), 
+                   color=self.colors['danger'], linestyle='--', alpha=0.8,
+                   label=f'平均最高温: {self.weather_data["最高温"].mean():.1f}°C')
+        ax.axvline(self.weather_data['最低温'].mean(), 
+                   color=self.colors['primary'], linestyle='--', alpha=0.8,
+                   label=f'平均最低温: {self.weather_data["最低温"].mean():.1f}°C')
+        
+        ax.set_title('温度分布密度', color=self.colors['text'])
+        ax.set_xlabel('温度 (°C)', color=self.colors['text'])
+        ax.set_ylabel('密度', color=self.colors['text'])
+        ax.tick_params(colors=self.colors['text'])
+        
+        ax.legend(facecolor=self.colors['background'], 
+                 labelcolor=self.colors['text'],
+                 loc='upper right')
+        
+        for spine in ax.spines.values():
+            spine.set_color(self.colors['text'])
+        
+    def plot_aqi_timeline(self, ax):
+        """空气质量时间序列"""
+        series = self.downsampled('空气质量指数')
+        ax.plot(series['日期'], series['空气质量指数'], 
+                color=self.colors['warning'])
+        ax.set_title('空气质量指数变化')
+
+def _init_batch_worker():
+    """Use the non-interactive backend in worker processes"""
+    import matplotlib
+    matplotlib.use('Agg')
+
+def _render_city(city_name, variants=('full',)):
+    """Render the analysis figure of one city inside a worker process"""
+    analyzer = WeatherAnalyzer(city_name)
+    analyzer.create_analysis(variants=variants)
+    return city_name
+
+def run_batch(cities='all', jobs=None, variants=('full',)):
+    """Render analysis figures for many cities in a process pool
+
+    Each worker loads its city's pre-parsed partition from the city index,
+    the same frame the single-city and web paths render, so all of them
+    share one chart cache fingerprint.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    start = time.perf_counter()
+
+    # 在主进程中检查并按需重建城市索引，避免各工作进程同时重建
+    available = CityIndexProcessor().list_cities()
+
+    if cities == 'all':
+        cities = available
+    missing = [city for city in cities if city not in available]
+    for city in missing:
+        print(f"未找到{city}的天气数据，已跳过")
+    cities = [city for city in cities if city in available]
+
+    rendered, failed = [], []
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_batch_worker) as executor:
+        futures = {
+            executor.submit(_render_city, city, variants): city
+            for city in cities
+        }
+        for future in as_completed(futures):
+            city = futures[future]
+            try:
+                rendered.append(future.result())
+            except Exception as e:
+                failed.append(city)
+                print(f"{city}分析失败: {e}")
+
+    elapsed = time.perf_counter() - start
+    throughput = len(rendered) / elapsed if elapsed > 0 else 0.0
+    print(f"批量分析完成: {len(rendered)}张图表, 失败{len(failed)}个, "
+          f"耗时{elapsed:.1f}秒, 吞吐量{throughput:.2f}张/秒")
+    return {'rendered': rendered, 'failed': failed + missing,
+            'elapsed': elapsed, 'charts_per_second': throughput}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='城市天气数据综合分析')
+    parser.add_argument('--cities', nargs='+',
+                        help='批量分析的城市列表，或使用 all 分析全部城市')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='并行渲染的进程数（默认为CPU核数）')
+    parser.add_argument('--variants', nargs='+', default=['full'],
+                        choices=['full', 'thumbnail', 'svg'],
+                        help='输出的图表规格（完整PNG、缩略图、SVG）')
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.cities:
+        cities = 'all' if args.cities == ['all'] else args.cities
+        run_batch(cities, jobs=args.jobs, variants=tuple(args.variants))
+    else:
+        city_name = input("请输入城市名称（例如：北京市、上海市、广州市）：")
+        try:
+            analyzer = WeatherAnalyzer(city_name)
+            analyzer.create_analysis()
+        except Exception as e:
+            print(f"分析失败: {e}") 
\ No newline at end of file
@@ -0,0 +1,148 @@
+import numpy as np
+
+def scott_bandwidth(values):
+    """Scott's rule bandwidth, the same default seaborn/scipy use"""
+    values = np.asarray(values, dtype=float)
+    if len(values) < 2:
+        return 1.0
+    std = values.std(ddof=1)
+    return float(std * len(values) ** (-1 / 5)) if std > 0 else 1.0
+
+def binned_kde(values, grid_size=512, bandwidth=None, cut=3):
+    """Gaussian KDE evaluated on a regular grid via linear binning and FFT convolution
+
+    The samples are spread onto ``grid_size`` bins with linear binning and the
+    bin counts are convolved with a sampled Gaussian kernel through an FFT,
+    so the cost is O(n + grid_size·log(grid_size)) instead of O(n·grid_size).
+
+    Returns ``(grid, density)``; both are empty if there are fewer than two
+    finite samples.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    n = len(values)
+    if n < 2:
+        return np.array([]), np.array([])
+
+    if bandwidth is None:
+        bandwidth = scott_bandwidth(values)
+
+    low = values.min() - cut * bandwidth
+    high = values.max() + cut * bandwidth
+    grid = np.linspace(low, high, grid_size)
+    delta = grid[1] - grid[0]
+
+    # 线性分箱：每个样本按距离分配到相邻两个格点
+    position = (values - low) / delta
+    left = np.floor(position).astype(int)
+    weight_right = position - left
+    counts = np.bincount(left, weights=1 - weight_right, minlength=grid_size + 1)
+    counts += np.bincount(left + 1, weights=weight_right, minlength=grid_size + 1)
+    counts = counts[:grid_size]
+
+    half_width = int(min(grid_size - 1, np.ceil(4 * bandwidth / delta)))
+    offsets = np.arange(-half_width, half_width + 1) * delta
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2)
+
+    fft_size = 1 << int(np.ceil(np.log2(grid_size + 2 * half_width)))
+    smoothed = np.fft.irfft(np.fft.rfft(counts, fft_size) * np.fft.rfft(kernel, fft_size), fft_size)
+    density = smoothed[half_width:half_width + grid_size]
+    density = np.clip(density, 0, None) / (n * bandwidth * np.sqrt(2 * np.pi))
+    return grid, density
+
+def calendar_matrix(dates, values):
+    """Average values into a 12×31 (month × day) matrix with direct NumPy indexing
+
+    Days without data (including invalid dates such as 2月30日) are NaN.
+    Multi-year series are averaged per calendar day.
+    """
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnat(dates) & np.isfinite(values)
+    dates, values = dates[valid], values[valid]
+
+    months = dates.astype('datetime64[M]')
+    month_index = months.astype(int) % 12
+    day_index = (dates - months).astype(int)
+    cell = month_index * 31 + day_index
+
+    sums = np.bincount(cell, weights=values, minlength=12 * 31)
+    counts = np.bincount(cell, minlength=12 * 31)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        matrix = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+    return matrix.reshape(12, 31)
+
+DOWNSAMPLE_METHODS = ['lttb', 'minmax']
+
+def _finite_points(x, y):
+    """Positions and float values of the points with a finite y"""
+    y = np.asarray(y, dtype=float)
+    positions = np.flatnonzero(np.isfinite(y))
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype('datetime64[ns]').astype(np.int64)
+    return positions, x[positions].astype(float), y[positions]
+
+def lttb_indices(x, y, n_out):
+    """Row positions kept by largest-triangle-three-buckets downsampling
+
+    The first and last points are kept; the points in between are split into
+    ``n_out - 2`` equal buckets, and from each bucket the point forming the
+    largest triangle with the previously kept point and the next bucket's
+    mean is kept. Points with a NaN value are skipped. The bucket means and
+    the triangle areas are computed with array operations; only the choice
+    that depends on the previously kept point walks the buckets in order.
+    """
+    positions, x, y = _finite_points(x, y)
+    n = len(positions)
+    if n_out >= n:
+        return positions
+    if n_out < 3:
+        return positions[[0, -1]]
+
+    edges = np.floor(np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(int) + 1
+    sums_x = np.add.reduceat(x[:n - 1], edges[:-1])
+    sums_y = np.add.reduceat(y[:n - 1], edges[:-1])
+    sizes = np.diff(edges)
+    # 下一个桶的均值（最后一个桶的下一个为终点）
+    next_x = np.append((sums_x / sizes)[1:], x[-1])
+    next_y = np.append((sums_y / sizes)[1:], y[-1])
+
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for b in range(n_out - 2):
+        start, end = edges[b], edges[b + 1]
+        # 三角形面积的两倍（省略常数因子不影响比较）
+        area = np.abs((x[previous] - next_x[b]) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (next_y[b] - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[b + 1] = previous
+    return positions[selected]
+
+def minmax_indices(y, n_out):
+    """Row positions of the minimum and maximum of each bucket (about ``n_out`` points in total)
+
+    Keeps the extremes that LTTB may smooth away, e.g. single-day AQI spikes.
+    Fully vectorized: one lexsort finds every bucket's min and max at once.
+    """
+    positions, _, y = _finite_points(np.arange(len(y)), y)
+    n = len(positions)
+    if n_out >= n:
+        return positions
+    n_buckets = max(1, n_out // 2)
+
+    bucket = np.arange(n) * n_buckets // n
+    order = np.lexsort((y, bucket))
+    last = np.flatnonzero(np.append(bucket[order][1:] != bucket[order][:-1], True))
+    first = np.append(0, last[:-1] + 1)
+    keep = np.union1d(order[first], order[last])
+    return positions[np.union1d(keep, [0, n - 1])]
+
+def downsample_indices(x, y, n_out, method='lttb'):
+    """Row positions of a downsampled series, in order ('lttb' or 'minmax')"""
+    if method == 'lttb':
+        return lttb_indices(x, y, n_out)
+    if method == 'minmax':
+        return minmax_indices(y, n_out)
+    raise ValueError(f"Unknown downsampling method: {method}. Available: {DOWNSAMPLE_METHODS}")
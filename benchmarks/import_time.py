@@ -0,0 +1,92 @@
+"""Import-time budget check for the pipeline, analysis and web entry points.
+
+Each target is imported in a fresh interpreter with ``python -X importtime``.
+The script fails if a target's cumulative import time exceeds its budget or
+if it pulls in a heavy dependency that should only load on demand.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 5 --scale 1.5
+"""
+import os
+import re
+import sys
+import argparse
+import subprocess
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+WEB_DIR = BASE_DIR / 'web'
+
+# 模块 -> (导入时间预算(毫秒), 不允许在导入时加载的依赖)
+BUDGETS = {
+    'main': (60, ['pandas', 'numpy', 'chardet']),
+    'analysis.city_weather_analysis': (200, ['pandas', 'matplotlib', 'seaborn']),
+    'processor.process_city_index': (60, ['pandas', 'numpy']),
+    'visualize.visualizer': (300, ['pandas', 'numpy']),
+    'dashboard.views': (300, ['pandas', 'numpy', 'matplotlib']),
+}
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+def measure(module):
+    """Import a module in a fresh interpreter and parse -X importtime output"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([str(BASE_DIR), str(WEB_DIR), env.get('PYTHONPATH', '')])
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    cumulative_us = None
+    loaded = set()
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        name = match.group(4)
+        loaded.add(name.split('.')[0])
+        if name == module:
+            cumulative_us = int(match.group(2))
+    if cumulative_us is None:
+        raise RuntimeError(f"No import timing found for {module}")
+    return cumulative_us / 1000, loaded
+
+def run(repeat=3, scale=1.0):
+    failures = []
+    for module, (budget_ms, forbidden) in BUDGETS.items():
+        timings = []
+        loaded = set()
+        for _ in range(repeat):
+            elapsed_ms, loaded = measure(module)
+            timings.append(elapsed_ms)
+        # 取多次运行的最小值，降低磁盘缓存与系统负载的干扰
+        best_ms = min(timings)
+        limit_ms = budget_ms * scale
+        heavy = sorted(set(forbidden) & loaded)
+
+        status = 'ok'
+        if best_ms > limit_ms:
+            status = 'over budget'
+            failures.append(f"{module}: {best_ms:.1f} ms > {limit_ms:.1f} ms")
+        if heavy:
+            status = 'eager imports'
+            failures.append(f"{module}: imports {', '.join(heavy)} at import time")
+        print(f"{module:<36} {best_ms:8.1f} ms  (budget {limit_ms:6.1f} ms)  {status}")
+
+    if failures:
+        print("\nImport-time regressions:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check import-time budgets')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='fresh interpreters per module; the fastest run is used')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='multiply every budget, e.g. on slow CI machines')
+    args = parser.parse_args()
+    sys.exit(run(repeat=args.repeat, scale=args.scale))
@@ -1,73 +1,310 @@
-import logging
-from pathlib import Path
-from processor.process_daily_data import WeatherDataProcessor
-from processor.process_monthly_data import MonthlyDataProcessor
-from processor.process_yearly_data import YearlyDataProcessor
-from processor.process_province_data import ProvinceDataProcessor
-from processor.process_statistic_data import StatisticsProcessor
-from processor.process_comfort_cities import ComfortCitiesProcessor
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
-
-class WeatherDataPipeline:
-    def __init__(self):
-        self.base_dir = Path(__file__).parent
-        self.database_dir = self.base_dir / 'database'
-        
-        self.database_dir.mkdir(exist_ok=True)
-        
-        self.daily_processor = WeatherDataProcessor()
-        self.monthly_processor = MonthlyDataProcessor()
-        self.yearly_processor = YearlyDataProcessor()
-        self.province_processor = ProvinceDataProcessor()
-        self.statistics_processor = StatisticsProcessor()
-        self.comfort_processor = ComfortCitiesProcessor()
-
-    def run_pipeline(self):
-        """运行完整的数据处理流水线"""
-        try:
-            logger.info("Starting data processing pipeline...")
-
-            # 1. 处理每日数据
-            logger.info("Processing daily data...")
-            daily_df = self.daily_processor.process_data()
-
-            # 2. 处理月度数据
-            logger.info("Processing monthly data...")
-            monthly_df = self.monthly_processor.process_monthly_data()
-
-            # 3. 处理年度数据
-            logger.info("Processing yearly data...")
-            yearly_df = self.yearly_processor.process_yearly_data()
-
-            # 4. 处理省份数据
-            logger.info("Processing province data...")
-            province_df = self.province_processor.process_province_data()
-
-            # 5. 处理统计数据
-            logger.info("Processing statistics data...")
-            self.statistics_processor.calculate_monthly_stats()
-
-            # 6. 处理舒适城市数据
-            logger.info("Processing comfort cities data...")
-            comfort_cities = self.comfort_processor.process_comfort_cities()
-
-            logger.info("Data processing pipeline completed successfully")
-            return True
-
-        except Exception as e:
-            logger.error(f"Error in data processing pipeline: {e}")
-            raise
-
-if __name__ == "__main__":
-    try:
-        pipeline = WeatherDataPipeline()
-        pipeline.run_pipeline()
-        logger.info("Pipeline execution completed successfully")
-    except Exception as e:
-        logger.error(f"Pipeline execution failed: {e}")
-        exit(1)
+import time
+import logging
+import argparse
+import importlib
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# 流水线各阶段，按依赖顺序排列
+# 处理器在阶段实际运行时才导入，避免启动时加载 pandas 等重量级依赖
+STAGES = {
+    'daily': {
+        'processor': ('processor.process_daily_data', 'WeatherDataProcessor'),
+        'run': 'process_data',
+        'depends_on': [],
+        'outputs': ['daily_data.csv'],
+        'description': 'daily data',
+        # 支持按月份增量重算（监听模式下仅重算受影响的月份）
+        'incremental': True,
+    },
+    'city_index': {
+        'processor': ('processor.process_city_index', 'CityIndexProcessor'),
+        'run': 'build_index',
+        'depends_on': ['daily'],
+        'outputs': ['daily_by_city/index.json'],
+        'description': 'city index',
+        # 与 daily 同时运行时直接复用其返回的数据，避免重新读取 CSV
+        'reuses_result_of': 'daily',
+    },
+    'comfort_index': {
+        'processor': ('processor.process_comfort_index', 'ComfortIndexProcessor'),
+        'run': 'build_index',
+        'depends_on': ['daily'],
+        'outputs': ['comfort_index.npz'],
+        'description': 'comfort range index',
+        'reuses_result_of': 'daily',
+    },
+    'comfort_thresholds': {
+        'processor': ('processor.process_comfort_thresholds', 'ComfortThresholdProcessor'),
+        'run': 'build_index',
+        'depends_on': ['daily'],
+        'outputs': ['comfort_thresholds.npz'],
+        'description': 'comfort threshold histograms',
+        'reuses_result_of': 'daily',
+    },
+    'events': {
+        'processor': ('processor.process_events', 'WeatherEventProcessor'),
+        'run': 'detect_events',
+        'depends_on': ['daily'],
+        'outputs': ['weather_events.csv'],
+        'description': 'weather events',
+        'reuses_result_of': 'daily',
+    },
+    'weather_cube': {
+        'processor': ('processor.process_weather_cube', 'WeatherCubeProcessor'),
+        'run': 'build_cube',
+        'depends_on': ['daily'],
+        'outputs': ['weather_cube.npz'],
+        'description': 'weather condition cube',
+        'reuses_result_of': 'daily',
+    },
+    'monthly': {
+        'processor': ('processor.process_monthly_data', 'MonthlyDataProcessor'),
+        'run': 'process_monthly_data',
+        'depends_on': ['daily'],
+        'outputs': ['monthly_data.csv'],
+        'description': 'monthly data',
+        'incremental': True,
+    },
+    'climate_features': {
+        'processor': ('processor.process_climate_similarity', 'ClimateFeatureProcessor'),
+        'run': 'build_features',
+        'depends_on': ['monthly'],
+        'outputs': ['climate_features.npz'],
+        'description': 'climate similarity features',
+        'reuses_result_of': 'monthly',
+    },
+    'yearly': {
+        'processor': ('processor.process_yearly_data', 'YearlyDataProcessor'),
+        'run': 'process_yearly_data',
+        'depends_on': ['monthly', 'events'],
+        'outputs': ['yearly_data.csv'],
+        'description': 'yearly data',
+    },
+    'province': {
+        'processor': ('processor.process_province_data', 'ProvinceDataProcessor'),
+        'run': 'process_province_data',
+        'depends_on': ['monthly'],
+        'outputs': ['province_data.csv'],
+        'description': 'province data',
+    },
+    'statistics': {
+        'processor': ('processor.process_statistic_data', 'StatisticsProcessor'),
+        'run': 'calculate_monthly_stats',
+        'depends_on': ['monthly', 'yearly', 'province'],
+        'outputs': ['statistics.json'],
+        'description': 'statistics data',
+    },
+    'comfort': {
+        'processor': ('processor.process_comfort_cities', 'ComfortCitiesProcessor'),
+        'run': 'process_comfort_cities',
+        'depends_on': ['monthly'],
+        'outputs': ['comfort_cities.json'],
+        'description': 'comfort cities data',
+    },
+}
+
+class WeatherDataPipeline:
+    def __init__(self, compression=None):
+        self.base_dir = Path(__file__).parent
+        self.database_dir = self.base_dir / 'database'
+        # 日、月、年数据额外写出的压缩副本格式
+        self.compression = compression
+
+        self.database_dir.mkdir(exist_ok=True)
+
+        self._processors = {}
+        self.results = {}
+
+    def get_processor(self, name):
+        """Import and construct a stage processor on first use"""
+        if name not in self._processors:
+            module_name, class_name = STAGES[name]['processor']
+            processor_class = getattr(importlib.import_module(module_name), class_name)
+            processor = processor_class()
+            if hasattr(processor, 'compression'):
+                processor.compression = self.compression
+            self._processors[name] = processor
+        return self._processors[name]
+
+    def downstream_of(self, names):
+        """The given stages plus every stage that depends on them"""
+        selected = set(names)
+        for name, stage in STAGES.items():
+            if any(dep in selected for dep in stage['depends_on']):
+                selected.add(name)
+        return [name for name in STAGES if name in selected]
+
+    def plan(self, stages=None, from_stages=None):
+        """Resolve the stages to run, grouped into waves that can run concurrently"""
+        selected = set(STAGES) if stages is None and from_stages is None else set()
+        unknown = set(stages or []) | set(from_stages or [])
+        unknown -= set(STAGES)
+        if unknown:
+            raise ValueError(f"Unknown stages: {sorted(unknown)}. Available: {list(STAGES)}")
+        if stages:
+            selected.update(stages)
+        if from_stages:
+            selected.update(self.downstream_of(from_stages))
+
+        waves = []
+        level = {}
+        for name in STAGES:
+            if name not in selected:
+                continue
+            deps = [dep for dep in STAGES[name]['depends_on'] if dep in selected]
+            level[name] = max((level[dep] + 1 for dep in deps), default=0)
+            if level[name] == len(waves):
+                waves.append([])
+            waves[level[name]].append(name)
+        return waves
+
+    def reused_artifacts(self, waves):
+        """Outputs of upstream stages that are not rerun and will be read from disk"""
+        planned = {name for wave in waves for name in wave}
+        reused = {}
+        for name in planned:
+            for dep in STAGES[name]['depends_on']:
+                if dep not in planned:
+                    for output in STAGES[dep]['outputs']:
+                        reused[output] = self.database_dir / output
+        return reused
+
+    def describe_plan(self, waves):
+        """Print the execution plan and the cached artifacts it relies on"""
+        print("Execution plan:")
+        for i, wave in enumerate(waves, 1):
+            for name in wave:
+                stage = STAGES[name]
+                outputs = ', '.join(stage['outputs'])
+                print(f"  wave {i}: {name:<18} {stage['description']} -> {outputs}")
+
+        reused = self.reused_artifacts(waves)
+        if reused:
+            print("Reused artifacts:")
+            for output, path in sorted(reused.items()):
+                if path.exists():
+                    modified = datetime.fromtimestamp(path.stat().st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+                    print(f"  {output:<26} cached, modified {modified}")
+                else:
+                    print(f"  {output:<26} MISSING")
+        else:
+            print("Reused artifacts: none")
+
+    def run_stage(self, name, months=None):
+        """Run a single stage and keep its result for downstream stages"""
+        stage = STAGES[name]
+        logger.info(f"Processing {stage['description']}...")
+        run = getattr(self.get_processor(name), stage['run'])
+        upstream = stage.get('reuses_result_of')
+        if upstream in self.results:
+            result = run(self.results[upstream])
+        elif months is not None and stage.get('incremental'):
+            result = run(months=months)
+        else:
+            result = run()
+        self.results[name] = result
+        return result
+
+    def run_pipeline(self, stages=None, from_stages=None, jobs=1, months=None):
+        """运行数据处理流水线（默认运行全部阶段，指定 months 时增量重算这些月份）"""
+        try:
+            waves = self.plan(stages, from_stages)
+            missing = [output for output, path in self.reused_artifacts(waves).items()
+                       if not path.exists()]
+            if missing:
+                raise FileNotFoundError(
+                    f"Upstream artifacts missing, include their stages in the run: {missing}")
+
+            # 记录本次运行各阶段输出的内容摘要，只有内容真正变化时才发布新的数据版本
+            from processor.data_watch import DATA_VERSION_FILE, artifact_digest, publish_data_version, read_data_version
+            outputs = {output: self.database_dir / output
+                       for wave in waves for name in wave for output in STAGES[name]['outputs']}
+            before = {output: artifact_digest(path) for output, path in outputs.items()}
+
+            logger.info("Starting data processing pipeline...")
+            for wave in waves:
+                if jobs > 1 and len(wave) > 1:
+                    with ThreadPoolExecutor(max_workers=jobs) as executor:
+                        # 同一批次的阶段互不依赖，可并行执行
+                        for future in [executor.submit(self.run_stage, name, months) for name in wave]:
+                            future.result()
+                else:
+                    for name in wave:
+                        self.run_stage(name, months)
+
+            changed = [output for output, path in outputs.items() if artifact_digest(path) != before[output]]
+            if changed or read_data_version(self.database_dir / DATA_VERSION_FILE) is None:
+                record = publish_data_version(self.database_dir, months)
+                logger.info(f"Data processing pipeline completed successfully, data version {record['version']} "
+                            f"(changed: {', '.join(changed) or 'none'})")
+            else:
+                logger.info("Data processing pipeline completed successfully, no artifact changed, data version kept")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error in data processing pipeline: {e}")
+            raise
+
+    def watch(self, interval=5.0, jobs=1):
+        """监听 data 目录，新增或修改的数据文件触发受影响月份的增量重算"""
+        from processor.data_watch import DataWatcher, affected_months
+
+        watcher = DataWatcher(self.base_dir / 'data')
+        logger.info(f"Watching {watcher.data_dir} for changes every {interval}s (Ctrl+C to stop)")
+        while True:
+            time.sleep(interval)
+            changed = watcher.poll()
+            if not changed:
+                continue
+            months = affected_months(changed)
+            logger.info(f"{len(changed)} data files changed, recomputing months: {months or 'all'}")
+            self.results = {}
+            try:
+                self.run_pipeline(jobs=jobs, months=months)
+            except Exception:
+                # 单次重算失败不退出监听，等待下一次数据变更
+                logger.exception("Incremental recompute failed")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Weather data processing pipeline')
+    parser.add_argument('--stages', nargs='+', metavar='STAGE',
+                        help=f"run only these stages ({', '.join(STAGES)})")
+    parser.add_argument('--from', dest='from_stages', nargs='+', metavar='STAGE',
+                        help='run these stages and every stage downstream of them')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='print the execution plan and reused artifacts without running')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='number of independent stages allowed to run concurrently')
+    parser.add_argument('--watch', action='store_true',
+                        help='keep running and recompute the affected months when files under data/ change')
+    parser.add_argument('--interval', type=float, default=5.0,
+                        help='seconds between scans of data/ in watch mode')
+    parser.add_argument('--compress', choices=['gzip', 'zstd'],
+                        help='also write compressed copies of the daily, monthly and yearly CSVs '
+                             '(zstd needs the zstandard package, otherwise gzip is used)')
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        pipeline = WeatherDataPipeline(compression=args.compress)
+        if args.dry_run:
+            pipeline.describe_plan(pipeline.plan(args.stages, args.from_stages))
+        elif args.watch:
+            pipeline.watch(args.interval, jobs=args.jobs)
+        else:
+            pipeline.run_pipeline(args.stages, args.from_stages, jobs=args.jobs)
+            logger.info("Pipeline execution completed successfully")
+    except KeyboardInterrupt:
+        logger.info("Watch mode stopped")
+    except Exception as e:
+        logger.error(f"Pipeline execution failed: {e}")
+        exit(1)
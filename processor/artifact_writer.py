@@ -0,0 +1,189 @@
+import os
+import gzip
+import json
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 压缩格式 -> 附加的文件后缀；压缩文件与原CSV并存，下游阶段与网页仍读取原CSV
+COMPRESSIONS = {'gzip': '.gz', 'zstd': '.zst'}
+
+CHUNK_ROWS = 20000
+
+HASH_MANIFEST = 'artifact_hashes.json'
+
+_manifest_lock = threading.Lock()
+
+def resolve_compression(compression):
+    """Validated compression name, falling back to gzip when zstandard is not installed"""
+    if compression in (None, 'none'):
+        return None
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compression}. Available: {list(COMPRESSIONS)}")
+    if compression == 'zstd':
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            logger.warning("zstandard is not installed, writing gzip instead")
+            return 'gzip'
+    return compression
+
+def open_compressed(path, compression):
+    """Binary write stream for a compressed file (byte-identical for identical content)"""
+    if compression == 'zstd':
+        import zstandard
+        return zstandard.ZstdCompressor(level=3).stream_writer(open(path, 'wb'), closefd=True)
+    # mtime=0 使相同内容得到相同的压缩文件
+    return gzip.GzipFile(path, 'wb', compresslevel=6, mtime=0)
+
+class ArtifactWriter:
+    """Write CSV artifacts in row chunks on a background thread.
+
+    The frame is formatted chunk by chunk into a temporary file while its
+    SHA-256 is computed, so the caller can keep computing until ``wait()``.
+    The temporary files replace the artifacts only in ``wait()`` (or when the
+    ``with`` block exits cleanly); if the block raises, pending writes are
+    discarded so a CSV is never published without the outputs computed
+    alongside it. If the content hash equals the one recorded for the file on
+    disk, the artifact keeps its modification time, which keeps the caches
+    keyed by it (city index, SQL tables, web views) valid. With
+    ``compression`` a gzip/zstd copy is written from the same formatted chunks.
+    """
+
+    def __init__(self, database_dir, compression=None, chunk_rows=CHUNK_ROWS):
+        self.database_dir = Path(database_dir)
+        self.manifest_path = self.database_dir / HASH_MANIFEST
+        self.compression = resolve_compression(compression)
+        self.chunk_rows = chunk_rows
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='artifact-writer')
+        self._futures = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.wait()
+            else:
+                self.discard()
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def submit_csv(self, df, path, encoding='utf-8-sig', **to_csv_kwargs):
+        """Queue a CSV write; ``df`` must not be modified until ``wait()`` returns"""
+        future = self._executor.submit(self.format_csv, df, path, encoding, **to_csv_kwargs)
+        self._futures.append(future)
+        return future
+
+    def wait(self):
+        """Publish the queued writes, returning the rewritten paths
+
+        If any write failed, none of them is published and the first error is raised.
+        """
+        futures = self._futures
+        try:
+            staged = [future.result() for future in futures]
+        except BaseException:
+            self.discard()
+            raise
+        self._futures = []
+        return [path for item in staged for path in self.publish(*item)]
+
+    def discard(self):
+        """Cancel the queued writes and remove the temporary files of finished ones"""
+        futures, self._futures = self._futures, []
+        for future in futures:
+            future.cancel()
+        for future in futures:
+            if future.cancelled() or future.exception() is not None:
+                continue
+            for tmp_path in future.result()[1]:
+                tmp_path.unlink(missing_ok=True)
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def is_unchanged(self, path, digest):
+        """Whether ``path`` still holds the content recorded with this digest"""
+        entry = self.load_manifest().get(path.name)
+        if entry is None or entry['sha256'] != digest or not path.exists():
+            return False
+        stat = path.stat()
+        # 文件在记录之后被其他程序改写时不再信任记录的哈希
+        return entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns
+
+    def record(self, paths, digest):
+        """Record the content digest and current stat of written artifacts"""
+        with _manifest_lock:
+            manifest = self.load_manifest()
+            for path in paths:
+                stat = path.stat()
+                manifest[path.name] = {'sha256': digest, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+            tmp_path = self.manifest_path.with_name(f'{HASH_MANIFEST}.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.manifest_path)
+
+    def format_csv(self, df, path, encoding='utf-8-sig', **to_csv_kwargs):
+        """Format a CSV (plus its compressed copy) into temporary files
+
+        Returns ``(targets, tmp_paths, digest)`` for ``publish``.
+        """
+        path = Path(path)
+        targets = [path]
+        if self.compression:
+            targets.append(path.with_name(path.name + COMPRESSIONS[self.compression]))
+        tmp_paths = [target.with_name(f'{target.name}.tmp') for target in targets]
+
+        sha256 = hashlib.sha256()
+        streams = [open(tmp_paths[0], 'wb')]
+        try:
+            if self.compression:
+                streams.append(open_compressed(tmp_paths[1], self.compression))
+            for start in range(0, max(len(df), 1), self.chunk_rows):
+                text = df.iloc[start:start + self.chunk_rows].to_csv(
+                    None, header=start == 0, **to_csv_kwargs)
+                # BOM 只在首块写入
+                data = text.encode(encoding if start == 0 else encoding.replace('-sig', ''))
+                sha256.update(data)
+                for stream in streams:
+                    stream.write(data)
+        except BaseException:
+            for stream in streams:
+                stream.close()
+            for tmp_path in tmp_paths:
+                tmp_path.unlink(missing_ok=True)
+            raise
+        for stream in streams:
+            stream.close()
+        return targets, tmp_paths, sha256.hexdigest()
+
+    def publish(self, targets, tmp_paths, digest):
+        """Move formatted files into place, skipping targets whose content is unchanged"""
+        written = []
+        for target, tmp_path in zip(targets, tmp_paths):
+            if self.is_unchanged(target, digest):
+                tmp_path.unlink()
+                continue
+            os.replace(tmp_path, target)
+            written.append(target)
+        if written:
+            self.record(written, digest)
+            logger.info(f"Wrote {', '.join(target.name for target in written)}")
+        else:
+            logger.info(f"{targets[0].name} unchanged, kept the existing file")
+        return written
+
+    def write_csv(self, df, path, encoding='utf-8-sig', **to_csv_kwargs):
+        """Format and publish a CSV in the calling thread, returning the paths actually rewritten"""
+        return self.publish(*self.format_csv(df, path, encoding, **to_csv_kwargs))
@@ -0,0 +1,123 @@
+import os
+import json
+import time
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+MANIFEST_FILE = 'manifest.json'
+POINTER_FILE = 'current.json'
+
+def publish_column_store(df, store_dir, keep_versions=2):
+    """Publish a DataFrame as one .npy file per column plus a manifest
+
+    Numeric columns are stored as-is; other columns are dictionary-encoded as
+    int32 codes (-1 for missing) with the sorted dictionary in the manifest.
+    Each publish writes a new version directory and then atomically replaces
+    ``current.json``, so readers that already mapped an older version keep a
+    consistent view.
+    """
+    import pandas as pd
+
+    store_dir = Path(store_dir)
+    version = f'v{time.time_ns()}'
+    version_dir = store_dir / version
+    version_dir.mkdir(parents=True)
+
+    columns = []
+    for i, name in enumerate(df.columns):
+        series = df[name]
+        file_name = f'c{i:03d}.npy'
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            values = series.to_numpy()
+            if values.dtype == object:
+                # 可空整数列含缺失值时转为浮点存储
+                values = series.to_numpy(dtype=float, na_value=np.nan)
+            np.save(version_dir / file_name, values)
+            columns.append({'name': name, 'file': file_name, 'encoding': 'plain'})
+        else:
+            codes, dictionary = pd.factorize(series, sort=True)
+            np.save(version_dir / file_name, codes.astype(np.int32))
+            columns.append({'name': name, 'file': file_name, 'encoding': 'dictionary',
+                            'dictionary': [str(value) for value in dictionary]})
+
+    with open(version_dir / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump({'rows': len(df), 'columns': columns}, f, ensure_ascii=False)
+
+    tmp_path = store_dir / f'{POINTER_FILE}.{version}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': version}, f)
+    os.replace(tmp_path, store_dir / POINTER_FILE)
+
+    # 清理旧版本；仍被其他进程映射的文件在部分系统上无法删除，留待下次清理
+    versions = sorted(path for path in store_dir.iterdir() if path.is_dir() and path.name.startswith('v'))
+    for old in versions[:-keep_versions]:
+        shutil.rmtree(old, ignore_errors=True)
+    return version_dir
+
+class ColumnStore:
+    """Read-only, memory-mapped view of a published table.
+
+    Columns are mapped lazily with ``np.load(mmap_mode='r')``, so every
+    process shares the OS page cache copy instead of parsing its own.
+    """
+
+    def __init__(self, store_dir):
+        store_dir = Path(store_dir)
+        with open(store_dir / POINTER_FILE, 'r', encoding='utf-8') as f:
+            self.version = json.load(f)['version']
+        self.version_dir = store_dir / self.version
+        with open(self.version_dir / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        self.rows = manifest['rows']
+        self.columns = {column['name']: column for column in manifest['columns']}
+        self._arrays = {}
+        self._dictionaries = {}
+
+    def __len__(self):
+        return self.rows
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def array(self, name):
+        """Column as stored: values, or int32 codes for dictionary-encoded columns"""
+        if name not in self._arrays:
+            if name not in self.columns:
+                raise KeyError(f"Column not in store: {name}")
+            path = self.version_dir / self.columns[name]['file']
+            self._arrays[name] = np.load(path, mmap_mode='r') if self.rows else np.load(path)
+        return self._arrays[name]
+
+    def dictionary(self, name):
+        """Dictionary of an encoded column (empty for plain columns)"""
+        if name not in self._dictionaries:
+            self._dictionaries[name] = np.asarray(self.columns[name].get('dictionary', []), dtype=object)
+        return self._dictionaries[name]
+
+    def code_of(self, name, value):
+        """Code of ``value`` in an encoded column, or -1 if it never occurs"""
+        dictionary = self.dictionary(name)
+        if value is None or len(dictionary) == 0:
+            return -1
+        position = int(np.searchsorted(dictionary, value))
+        if position < len(dictionary) and dictionary[position] == value:
+            return position
+        return -1
+
+    def values(self, name, rows=None):
+        """Column values with encoded columns decoded (None where missing)"""
+        stored = self.array(name)
+        if rows is not None:
+            stored = stored[rows]
+        if self.columns[name]['encoding'] != 'dictionary':
+            return stored
+        lookup = np.append(self.dictionary(name), None)
+        return lookup[stored]
+
+    def to_frame(self, columns=None):
+        """Materialize the selected columns as a DataFrame (copies the data)"""
+        import pandas as pd
+        columns = list(self.columns) if columns is None else columns
+        return pd.DataFrame({name: self.values(name) for name in columns})
@@ -0,0 +1,119 @@
+import logging
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 校验规则: 规则名 -> 隔离原因说明；任一规则不通过的行写入隔离文件
+VALIDATION_RULES = {
+    'date_format': '日期无法解析',
+    'date_out_of_range': '日期不在文件所属月份内',
+    'high_temp_invalid': '最高温缺失或无法解析',
+    'low_temp_invalid': '最低温缺失或无法解析',
+    'temp_out_of_range': '气温超出合理范围',
+    'temp_inverted': '最低温高于最高温',
+    'wind_format': '风力风向无法解析',
+    'aqi_format': '空气质量指数无法解析',
+    'duplicate': '城市与日期重复',
+}
+
+# 数据源中的合法占位值：保留该行，对应字段记为缺失，仅计数
+MISSING_MARKERS = {
+    'wind_missing': '微风',
+    'aqi_missing': '-',
+}
+
+TEMP_RANGE = (-60, 60)
+
+DATE_PATTERN = r'(\d{4}-\d{2}-\d{2})\s+(.+)'
+WIND_PATTERN = r'^([东南西北]+)风(\d+)级'
+AQI_PATTERN = r'^\s*\d+'
+
+RAW_COLUMNS = ['日期', '最高温', '最低温', '天气', '风力风向', '空气质量指数']
+
+def parse_temperature(series):
+    """Temperature strings such as '26°' as floats (NaN where unparsable)"""
+    import pandas as pd
+    text = series.astype('string').str.replace('°', '', regex=False).str.strip()
+    return pd.to_numeric(text, errors='coerce').astype(float)
+
+def as_text(series):
+    """Extracted string column with NaN for missing and the default string dtype"""
+    import pandas as pd
+    return pd.Series(series.to_numpy(dtype=object, na_value=np.nan), index=series.index)
+
+def validate_daily_records(df, key_columns=('城市',)):
+    """Validate raw daily rows with whole-column checks
+
+    Expects the raw columns plus ``来源月份`` (the 'YYYY-MM' of the source
+    file, used for the date range check). Returns ``(valid, quarantined,
+    counts)``: the passing rows with parsed 日期/星期/最高温/最低温/风向/风力,
+    the failing raw rows with a ``原因`` column, and the number of rows
+    failing each rule (plus the counts of kept missing markers). Duplicate
+    (key, date) rows keep the last occurrence.
+    """
+    import pandas as pd
+
+    dates = df['日期'].astype('string').str.extract(DATE_PATTERN)
+    parsed_dates = pd.to_datetime(dates[0], format='%Y-%m-%d', errors='coerce')
+    high = parse_temperature(df['最高温'])
+    low = parse_temperature(df['最低温'])
+
+    wind_text = df['风力风向'].astype('string')
+    wind = wind_text.str.extract(WIND_PATTERN)
+    wind_missing = (wind_text.isna()
+                    | wind_text.str.contains(MISSING_MARKERS['wind_missing'], regex=False)).to_numpy(bool)
+
+    aqi_text = df['空气质量指数'].astype('string').str.strip()
+    aqi_missing = (aqi_text.isna() | (aqi_text == MISSING_MARKERS['aqi_missing'])).to_numpy(bool)
+
+    date_valid = parsed_dates.notna().to_numpy()
+    high_valid, low_valid = high.notna().to_numpy(), low.notna().to_numpy()
+    high_in_range = high.between(*TEMP_RANGE).to_numpy()
+    low_in_range = low.between(*TEMP_RANGE).to_numpy()
+    failures = {
+        'date_format': ~date_valid,
+        'date_out_of_range': date_valid & df['来源月份'].notna().to_numpy()
+                             & (dates[0].str[:7] != df['来源月份']).fillna(False).to_numpy(bool),
+        'high_temp_invalid': ~high_valid,
+        'low_temp_invalid': ~low_valid,
+        'temp_out_of_range': (high_valid & ~high_in_range) | (low_valid & ~low_in_range),
+        'temp_inverted': (low > high).to_numpy(),
+        'wind_format': wind[0].isna().to_numpy() & ~wind_missing,
+        'aqi_format': ~aqi_text.str.match(AQI_PATTERN).fillna(False).to_numpy(bool) & ~aqi_missing,
+    }
+    failed = np.logical_or.reduce(list(failures.values()))
+
+    # 重复行判定基于(键, 日期)哈希表，只在其余规则均通过的行之间进行
+    keys = list(key_columns) + ['日期']
+    duplicate = np.zeros(len(df), dtype=bool)
+    passing = np.flatnonzero(~failed)
+    duplicate[passing] = pd.DataFrame({
+        **{column: df[column].to_numpy()[passing] for column in key_columns},
+        '日期': dates[0].to_numpy()[passing],
+    }).duplicated(subset=keys, keep='last').to_numpy()
+    failures['duplicate'] = duplicate
+    failed |= duplicate
+
+    counts = {rule: int(mask.sum()) for rule, mask in failures.items()}
+    counts['wind_missing'] = int(wind_missing.sum())
+    counts['aqi_missing'] = int(aqi_missing.sum())
+
+    valid = df[~failed].copy()
+    valid['日期'] = as_text(dates[0][~failed])
+    valid['星期'] = as_text(dates[1][~failed])
+    valid['最高温'] = high[~failed]
+    valid['最低温'] = low[~failed]
+    valid['风向'] = as_text(wind[0][~failed])
+    valid['风力'] = pd.to_numeric(wind[1][~failed], errors='coerce').astype(float)
+
+    # 原因仅对被隔离的少量行拼接
+    reasons = np.array([VALIDATION_RULES[rule] for rule in failures])
+    reason_matrix = np.stack(list(failures.values()), axis=1)[failed]
+    columns = [column for column in dict.fromkeys([*key_columns, '城市', '来源月份']) if column in df.columns]
+    quarantined = df.loc[failed, columns + RAW_COLUMNS].copy()
+    quarantined['原因'] = [';'.join(reasons[row]) for row in reason_matrix]
+
+    logger.info(f"Validated {len(df)} daily rows, {int(failed.sum())} quarantined. Rule counts: {counts}")
+    return valid, quarantined, counts
@@ -0,0 +1,145 @@
+import os
+import re
+import json
+import hashlib
+import time
+import zipfile
+import logging
+from pathlib import Path
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 原始数据文件名为 YYYYMM.csv，据此判断受影响的月份
+MONTH_FILE_PATTERN = re.compile(r'^(\d{4})(\d{2})$')
+
+ARCHIVE_SUFFIXES = {'.zip'}
+
+DATA_VERSION_FILE = 'data_version.json'
+
+def archive_member_name(info):
+    """Member name of a zip entry, fixing GBK names stored without the UTF-8 flag"""
+    if info.flag_bits & 0x800:
+        return info.filename
+    try:
+        return info.filename.encode('cp437').decode('gbk')
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return info.filename
+
+def extract_archive(archive_path, target_dir):
+    """Extract the CSV members of an archive, returning only the files whose content changed
+
+    Members whose bytes equal the file already on disk are skipped, so
+    re-dropping an archive with one new month only touches that month.
+    """
+    target_dir = Path(target_dir).resolve()
+    changed = []
+    with zipfile.ZipFile(archive_path) as archive:
+        for info in archive.infolist():
+            name = archive_member_name(info)
+            if info.is_dir() or not name.lower().endswith('.csv'):
+                continue
+            path = (target_dir / name).resolve()
+            if target_dir not in path.parents:
+                logger.warning(f"Skipping archive member outside the data directory: {name}")
+                continue
+            content = archive.read(info)
+            if path.exists() and path.stat().st_size == len(content) and path.read_bytes() == content:
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(content)
+            changed.append(path)
+    logger.info(f"Extracted {len(changed)} changed files from {archive_path}")
+    return changed
+
+def affected_months(paths):
+    """Sorted 'YYYY-MM' months touched by the changed files, or None if a full recompute is needed
+
+    Only monthly weather CSVs map to months; any other file (coordinates,
+    city/province lists) affects every month.
+    """
+    months = set()
+    for path in paths:
+        match = MONTH_FILE_PATTERN.match(Path(path).stem)
+        if Path(path).suffix.lower() != '.csv' or not match:
+            return None
+        months.add(f'{match.group(1)}-{match.group(2)}')
+    return sorted(months)
+
+def read_data_version(path):
+    """Current data version record, or None before the first publish"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def artifact_digest(path):
+    """Content digest of a pipeline output, or None if it does not exist
+
+    ``.npz`` archives are compared by their member names and CRCs, since the
+    zip entry timestamps change on every write even for identical arrays.
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+    digest = hashlib.sha256()
+    if path.suffix == '.npz':
+        with zipfile.ZipFile(path) as archive:
+            for info in sorted(archive.infolist(), key=lambda info: info.filename):
+                digest.update(f'{info.filename}:{info.CRC}:{info.file_size};'.encode('utf-8'))
+    else:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+def publish_data_version(database_dir, months=None):
+    """Bump the data version after a pipeline run (``months`` None means everything changed)"""
+    path = Path(database_dir) / DATA_VERSION_FILE
+    previous = read_data_version(path) or {}
+    record = {
+        'version': previous.get('version', 0) + 1,
+        'updated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'months': months,
+    }
+    tmp_path = path.with_name(f'{DATA_VERSION_FILE}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(record, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return record
+
+class DataWatcher:
+    """Poll the data directory for new or modified files"""
+
+    def __init__(self, data_dir):
+        self.data_dir = Path(data_dir)
+        self.snapshot = self.scan()
+
+    def scan(self):
+        """(size, mtime) of every file under the data directory"""
+        snapshot = {}
+        for path in self.data_dir.rglob('*'):
+            if path.is_file():
+                stat = path.stat()
+                snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def poll(self):
+        """Changed data files since the last poll, with archives replaced by their changed members"""
+        current = self.scan()
+        changed = [path for path, signature in current.items() if self.snapshot.get(path) != signature]
+        changed += [path for path in self.snapshot if path not in current]
+
+        files = []
+        extracted = False
+        for path in sorted(changed):
+            if path.suffix.lower() in ARCHIVE_SUFFIXES and path.exists():
+                files.extend(extract_archive(path, self.data_dir))
+                extracted = True
+            else:
+                files.append(path)
+
+        # 解压出的文件计入快照，避免下一轮重复触发
+        self.snapshot = self.scan() if extracted else current
+        return sorted(set(files))
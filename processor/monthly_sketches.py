@@ -0,0 +1,110 @@
+import os
+from pathlib import Path
+
+import numpy as np
+
+# 直方图规格: 指标 -> (日数据列, 首个分箱中心, 分箱宽度, 分箱数)
+# 温度为整数摄氏度，1°C 分箱可精确还原分位数；AQI 使用 5 为宽度的分箱
+SKETCH_BINS = {
+    'high': ('最高温', -50, 1, 101),
+    'low': ('最低温', -50, 1, 101),
+    'aqi': ('空气质量指数', 0, 5, 121),
+}
+
+ROLLUP_KEYS = {'city': 'cities', 'province': 'provinces', 'month': 'months', 'year': 'years'}
+
+def histogram_sketches(values, row_codes, n_rows, metric):
+    """Fixed-bin histograms of ``values`` for each of ``n_rows`` rows, shape (n_rows, bins)
+
+    Values outside the bin range are clipped into the first/last bin; NaNs and
+    rows with a negative code are skipped.
+    """
+    _, start, width, bins = SKETCH_BINS[metric]
+    values = np.asarray(values, dtype=float)
+    row_codes = np.asarray(row_codes)
+    valid = np.isfinite(values) & (row_codes >= 0)
+    positions = np.clip(np.rint((values[valid] - start) / width), 0, bins - 1).astype(np.int64)
+    counts = np.bincount(row_codes[valid] * bins + positions, minlength=n_rows * bins)
+    return counts.reshape(n_rows, bins).astype(np.int16)
+
+def bin_centers(metric):
+    """Value represented by each bin of a metric's histogram"""
+    _, start, width, bins = SKETCH_BINS[metric]
+    return start + width * np.arange(bins)
+
+def histogram_quantiles(histograms, q):
+    """Bin positions of quantiles from histograms along the last axis (-1 for empty rows)
+
+    Uses the 'lower' rank rule, so with 1-wide bins over integer data the
+    result equals ``np.quantile(values, q, method='lower')``.
+    """
+    histograms = np.atleast_2d(histograms)
+    q = np.atleast_1d(np.asarray(q, dtype=float))
+    cumulative = np.cumsum(histograms, axis=-1)
+    totals = cumulative[:, -1]
+    ranks = np.floor(q[None, :] * np.maximum(totals - 1, 0)[:, None])
+    # 每行累计计数单调，小于等于目标秩的分箱数即为 searchsorted(side='right')
+    positions = (cumulative[:, None, :] <= ranks[:, :, None]).sum(axis=-1)
+    positions = np.minimum(positions, histograms.shape[-1] - 1)
+    return np.where(totals[:, None] > 0, positions, -1)
+
+class MonthlySketchIndex:
+    """Mergeable per-city-month histograms of daily highs, lows and AQI.
+
+    Histograms are additive, so any rollup (cities, provinces, months, years)
+    is a sum of rows, and quantiles/distributions are read off the merged
+    histogram without touching the daily data.
+    """
+
+    def __init__(self, sketch_path=None):
+        if sketch_path is None:
+            base_dir = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            sketch_path = base_dir / 'database' / 'monthly_sketches.npz'
+        with np.load(sketch_path) as data:
+            self.city_ids = data['city_ids']
+            self.cities = data['cities']
+            self.provinces = data['provinces']
+            self.months = data['months']
+            self.histograms = {metric: data[f'hist_{metric}'] for metric in SKETCH_BINS}
+        self.years = np.array([month[:4] for month in self.months.tolist()])
+
+    def _check_metric(self, metric):
+        if metric not in SKETCH_BINS:
+            raise ValueError(f"Unknown metric: {metric}. Available: {list(SKETCH_BINS)}")
+
+    def select(self, cities=None, provinces=None, months=None, years=None):
+        """Boolean row mask for the given filters (each a list, or None for all)"""
+        mask = np.ones(len(self.cities), dtype=bool)
+        for values, column in ((cities, self.cities), (provinces, self.provinces),
+                               (months, self.months), (years, self.years)):
+            if values is not None:
+                mask &= np.isin(column, [str(value) for value in values])
+        return mask
+
+    def rollup(self, metric, **filters):
+        """Merged histogram of the rows matching the filters"""
+        self._check_metric(metric)
+        return self.histograms[metric][self.select(**filters)].sum(axis=0, dtype=np.int64)
+
+    def distribution(self, metric, **filters):
+        """(bin centers, day counts) of the merged histogram, for distribution charts"""
+        return bin_centers(metric), self.rollup(metric, **filters)
+
+    def quantile(self, metric, q, **filters):
+        """Quantile(s) of a metric over the rows matching the filters"""
+        positions = histogram_quantiles(self.rollup(metric, **filters), q)[0]
+        values = np.where(positions >= 0, bin_centers(metric)[np.maximum(positions, 0)], np.nan)
+        return float(values[0]) if np.ndim(q) == 0 else values
+
+    def quantiles_by(self, metric, q, by='city', **filters):
+        """Quantiles per city, province, month or year as (group names, values of shape (groups, len(q)))"""
+        self._check_metric(metric)
+        if by not in ROLLUP_KEYS:
+            raise ValueError(f"Unknown rollup: {by}. Available: {list(ROLLUP_KEYS)}")
+        mask = self.select(**filters)
+        groups, codes = np.unique(getattr(self, ROLLUP_KEYS[by])[mask], return_inverse=True)
+        merged = np.zeros((len(groups), self.histograms[metric].shape[1]), dtype=np.int64)
+        np.add.at(merged, codes, self.histograms[metric][mask])
+        positions = histogram_quantiles(merged, q)
+        values = np.where(positions >= 0, bin_centers(metric)[np.maximum(positions, 0)], np.nan)
+        return groups, values
@@ -0,0 +1,118 @@
+import os
+import json
+from pathlib import Path
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 分区各列的固定类型：无论数据来自流水线内存中的日数据还是读回的CSV，
+# 写出的分区内容都相同，依赖分区内容的缓存指纹不会因重建索引而失效
+INTEGER_COLUMNS = ['id', 'city_id']
+FLOAT_COLUMNS = ['province_id', '最高温', '最低温', '风力', '空气质量指数', '经度', '纬度']
+TEXT_COLUMNS = ['城市', '省份', '星期', '天气', '风向', '舒适度']
+
+class CityIndexProcessor:
+    """Partition daily_data.csv by city so one city can be loaded without reading the others.
+
+    Each partition is a pickled DataFrame with already-parsed column types
+    (datetime 日期, numeric 空气质量指数, derived 平均温度), so readers do not
+    repeat date or AQI parsing. ``index.json`` maps every city to its partition
+    and records the size/mtime of the source CSV the index was built from.
+    """
+
+    def __init__(self):
+        self.base_dir = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.database_dir = self.base_dir / 'database'
+        self.daily_data_path = self.database_dir / 'daily_data.csv'
+        self.index_dir = self.database_dir / 'daily_by_city'
+        self.manifest_path = self.index_dir / 'index.json'
+
+    def source_signature(self):
+        """Size and modification time of the daily CSV"""
+        stat = self.daily_data_path.stat()
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def load_manifest(self):
+        """Load the partition manifest, or None if the index was never built"""
+        if not self.manifest_path.exists():
+            return None
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def is_fresh(self):
+        """Check whether the index was built from the current daily CSV"""
+        manifest = self.load_manifest()
+        if manifest is None or not self.daily_data_path.exists():
+            return False
+        return manifest.get('source') == self.source_signature()
+
+    def prepare_daily_frame(self, df):
+        """Parse dates and AQI once and normalize column types so partitions are stored with final types"""
+        import pandas as pd
+        df = df.copy()
+        df['日期'] = pd.to_datetime(df['日期'])
+        if not pd.api.types.is_numeric_dtype(df['空气质量指数']):
+            df['空气质量指数'] = pd.to_numeric(
+                df['空气质量指数'].str.extract(r'(\d+)', expand=False),
+                errors='coerce'
+            )
+        for column in df.columns.intersection(INTEGER_COLUMNS):
+            df[column] = df[column].astype('int64')
+        for column in df.columns.intersection(FLOAT_COLUMNS):
+            df[column] = df[column].astype('float64')
+        for column in df.columns.intersection(TEXT_COLUMNS):
+            df[column] = df[column].astype('str')
+        df['平均温度'] = (df['最高温'] + df['最低温']) / 2
+        return df
+
+    def build_index(self, daily_df=None):
+        """Split the daily data into one partition per city"""
+        import pandas as pd
+        try:
+            if daily_df is None:
+                daily_df = pd.read_csv(self.daily_data_path)
+            df = self.prepare_daily_frame(daily_df)
+
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            for stale in self.index_dir.glob('part_*.pkl'):
+                stale.unlink()
+
+            cities = {}
+            for i, (city, group) in enumerate(df.groupby('城市', sort=False)):
+                file_name = f'part_{i:04d}.pkl'
+                group.reset_index(drop=True).to_pickle(self.index_dir / file_name)
+                cities[city] = {'file': file_name, 'rows': len(group)}
+
+            manifest = {'source': self.source_signature(), 'cities': cities}
+            with open(self.manifest_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False)
+
+            logger.info(f"City index built for {len(cities)} cities. Output saved to: {self.index_dir}")
+            return manifest
+
+        except Exception as e:
+            logger.error(f"Error building city index: {e}")
+            raise
+
+    def list_cities(self):
+        """Cities available in the index"""
+        if not self.is_fresh():
+            self.build_index()
+        return list(self.load_manifest()['cities'])
+
+    def load_city(self, city_name):
+        """Load the parsed daily rows of a single city"""
+        import pandas as pd
+        if not self.is_fresh():
+            logger.info("City index missing or stale, rebuilding...")
+            self.build_index()
+
+        entry = self.load_manifest()['cities'].get(city_name)
+        if entry is None:
+            return pd.DataFrame()
+        return pd.read_pickle(self.index_dir / entry['file'])
+
+if __name__ == "__main__":
+    processor = CityIndexProcessor()
+    processor.build_index()
@@ -0,0 +1,231 @@
+import os
+import json
+import argparse
+import logging
+from pathlib import Path
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 气候特征: 名称 -> 月度数据中的列（风速由各风向频率加权得到）
+FEATURES = {
+    'temperature': '月平均温',
+    'comfort_days': '舒适天数',
+    'aqi': '空气质量指数',
+    'wind_speed': None,
+}
+
+WIND_DIRECTIONS = ['东', '南', '西', '北', '东北', '东南', '西南', '西北']
+
+METRICS = ['cosine', 'euclidean']
+
+class ClimateFeatureProcessor:
+    """Build the normalized 12-month climate profile of every city.
+
+    Each city becomes one row of ``len(FEATURES) * n_months`` values. Every
+    column is z-normalized across cities and rows are additionally stored
+    L2-normalized, so cosine similarity to all cities is one matrix-vector
+    product. The matrix records the size/mtime of the monthly CSV it was
+    built from and is rebuilt when that changes.
+    """
+
+    def __init__(self):
+        self.base_dir = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.database_dir = self.base_dir / 'database'
+        self.monthly_data_path = self.database_dir / 'monthly_data.csv'
+        self.features_path = self.database_dir / 'climate_features.npz'
+
+    def source_signature(self):
+        """Size and modification time of the monthly CSV"""
+        stat = self.monthly_data_path.stat()
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def is_fresh(self):
+        """Check whether the feature matrix was built from the current monthly CSV"""
+        if not self.features_path.exists() or not self.monthly_data_path.exists():
+            return False
+        with np.load(self.features_path) as data:
+            return json.loads(str(data['source'])) == self.source_signature()
+
+    def monthly_wind_speed(self, df):
+        """Mean wind speed over all directions, weighted by direction frequency"""
+        freq = np.stack([df[f'{d}风频率'].to_numpy(dtype=float) for d in WIND_DIRECTIONS], axis=1)
+        speed = np.stack([df[f'{d}风均速'].to_numpy(dtype=float) for d in WIND_DIRECTIONS], axis=1)
+        freq, speed = np.nan_to_num(freq), np.nan_to_num(speed)
+        total = freq.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(total > 0, (freq * speed).sum(axis=1) / total, np.nan)
+
+    def build_features(self, monthly_df=None):
+        """Pivot the monthly data into the normalized city x (feature, month) matrix"""
+        import pandas as pd
+
+        try:
+            if monthly_df is None:
+                monthly_df = pd.read_csv(self.monthly_data_path)
+            df = monthly_df.drop_duplicates(subset=['城市', '年月'], keep='last').copy()
+            df['wind_speed'] = self.monthly_wind_speed(df)
+
+            city_codes, cities = pd.factorize(df['城市'], sort=True)
+            month_codes, months = pd.factorize(df['年月'], sort=True)
+            n_cities, n_months = len(cities), len(months)
+
+            raw = np.full((n_cities, len(FEATURES), n_months), np.nan)
+            for f, (name, column) in enumerate(FEATURES.items()):
+                raw[city_codes, f, month_codes] = df[column or name].to_numpy(dtype=float)
+            raw = raw.reshape(n_cities, -1)
+
+            # 缺失月份用该列的全国均值填充，标准化后即为0，不影响相似度
+            with np.errstate(invalid='ignore'):
+                mean = np.nanmean(raw, axis=0)
+                std = np.nanstd(raw, axis=0)
+            mean = np.nan_to_num(mean)
+            std = np.where(np.nan_to_num(std) > 0, std, 1.0)
+            features = np.where(np.isnan(raw), 0.0, (raw - mean) / std)
+
+            np.savez(
+                self.features_path,
+                source=json.dumps(self.source_signature()),
+                cities=np.asarray(cities, dtype=str),
+                months=np.asarray(months, dtype=str),
+                feature_names=np.asarray(list(FEATURES), dtype=str),
+                features=features,
+                mean=mean,
+                std=std
+            )
+            logger.info(f"Climate feature matrix built for {n_cities} cities x {features.shape[1]} features. "
+                        f"Output saved to: {self.features_path}")
+            return self.features_path
+
+        except Exception as e:
+            logger.error(f"Error building climate features: {e}")
+            raise
+
+    def load_index(self):
+        """Load the similarity index, rebuilding the feature matrix if the monthly data changed"""
+        if not self.is_fresh():
+            self.build_features()
+        return ClimateSimilarityIndex(self.features_path)
+
+class ClimateSimilarityIndex:
+    """Top-k climate neighbours from the normalized feature matrix"""
+
+    def __init__(self, features_path=None):
+        if features_path is None:
+            features_path = ClimateFeatureProcessor().features_path
+        with np.load(features_path) as data:
+            self.cities = data['cities']
+            self.months = data['months']
+            self.features = data['features']
+        norms = np.linalg.norm(self.features, axis=1, keepdims=True)
+        self.unit = self.features / np.where(norms > 0, norms, 1.0)
+        self.sq_norms = np.einsum('ij,ij->i', self.features, self.features)
+        self.city_rows = {city: i for i, city in enumerate(self.cities.tolist())}
+
+    def _row(self, city):
+        if city not in self.city_rows:
+            raise KeyError(f"City not in climate features: {city}")
+        return self.city_rows[city]
+
+    def _scores(self, rows, metric):
+        """Similarity of the given rows to every city, higher is more similar"""
+        if metric == 'cosine':
+            return self.unit[rows] @ self.unit.T
+        if metric == 'euclidean':
+            # ||a-b||² = ||a||² + ||b||² - 2a·b，取负距离使分数越大越相似
+            dot = self.features[rows] @ self.features.T
+            sq = self.sq_norms[rows][..., None] + self.sq_norms - 2 * dot
+            return -np.sqrt(np.maximum(sq, 0))
+        raise ValueError(f"Unknown metric: {metric}. Available: {METRICS}")
+
+    @staticmethod
+    def _top_k(scores, k):
+        """Column positions of the k highest scores per row, best first"""
+        if k < 1:
+            raise ValueError(f"k must be positive, got {k}")
+        k = min(k, scores.shape[-1])
+        top = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+        order = np.argsort(-np.take_along_axis(scores, top, axis=-1), axis=-1, kind='stable')
+        return np.take_along_axis(top, order, axis=-1)
+
+    def similar(self, city, k=5, metric='cosine'):
+        """The ``k`` cities with the climate most similar to ``city`` as (names, scores)
+
+        Scores are cosine similarities, or Euclidean distances for
+        ``metric='euclidean'``.
+        """
+        row = self._row(city)
+        scores = self._scores(row, metric)
+        scores[row] = -np.inf
+        top = self._top_k(scores, min(int(k), len(self.cities) - 1))
+        values = scores[top] if metric == 'cosine' else -scores[top]
+        return self.cities[top], values
+
+    def similar_records(self, city, k=5, metric='cosine'):
+        """Same as ``similar`` but as JSON-ready records"""
+        names, values = self.similar(city, k, metric)
+        key = 'similarity' if metric == 'cosine' else 'distance'
+        return [{'city': name, key: round(float(value), 4)}
+                for name, value in zip(names.tolist(), values.tolist())]
+
+    def all_pairs(self, k=5, metric='cosine', memory_limit_mb=64):
+        """Top-k neighbours of every city as (neighbour rows, scores), each (n_cities, k)
+
+        The score matrix is computed in row blocks sized so that one block
+        (plus its temporaries) stays within ``memory_limit_mb``.
+        """
+        n = len(self.cities)
+        k = min(int(k), n - 1)
+        # 每个块需同时保存点积与分数两份 float64 矩阵
+        block_rows = max(1, int(memory_limit_mb * 1024 * 1024 // (n * 8 * 2)))
+
+        neighbours = np.empty((n, k), dtype=np.int64)
+        values = np.empty((n, k))
+        for start in range(0, n, block_rows):
+            rows = np.arange(start, min(start + block_rows, n))
+            scores = self._scores(rows, metric)
+            scores[np.arange(len(rows)), rows] = -np.inf
+            top = self._top_k(scores, k)
+            neighbours[rows] = top
+            values[rows] = np.take_along_axis(scores, top, axis=1)
+        if metric == 'euclidean':
+            values = -values
+        return neighbours, values
+
+    def all_pairs_frame(self, k=5, metric='cosine', memory_limit_mb=64):
+        """All-pairs top-k neighbours as a long DataFrame (城市, 排名, 相似城市, 分数)"""
+        import pandas as pd
+
+        neighbours, values = self.all_pairs(k, metric, memory_limit_mb)
+        n, k = neighbours.shape
+        return pd.DataFrame({
+            '城市': np.repeat(self.cities, k),
+            '排名': np.tile(np.arange(1, k + 1), n),
+            '相似城市': self.cities[neighbours.ravel()],
+            '分数': values.ravel().round(4),
+        })
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='城市气候相似度查询')
+    parser.add_argument('--city', help='查询与该城市气候最相似的城市')
+    parser.add_argument('--k', type=int, default=5, help='返回的相似城市数量')
+    parser.add_argument('--metric', choices=METRICS, default='cosine', help='相似度度量')
+    parser.add_argument('--all-pairs', metavar='CSV',
+                        help='计算全部城市的相似城市并写入CSV文件')
+    parser.add_argument('--memory-mb', type=float, default=64,
+                        help='全量计算时单个分块矩阵的内存上限（MB）')
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    index = ClimateFeatureProcessor().load_index()
+    if args.all_pairs:
+        frame = index.all_pairs_frame(args.k, args.metric, args.memory_mb)
+        frame.to_csv(args.all_pairs, index=False, encoding='utf-8-sig')
+        logger.info(f"All-pairs climate neighbours saved to: {args.all_pairs}")
+    else:
+        city = args.city or input("请输入城市名称（例如：昆明市）：")
+        for record in index.similar_records(city, args.k, args.metric):
+            print(record)
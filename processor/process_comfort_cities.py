@@ -1,56 +1,93 @@
-import os
-import pandas as pd
-import json
-from pathlib import Path
-import logging
-
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-class ComfortCitiesProcessor:
-    def __init__(self):
-        self.base_dir = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        self.database_dir = self.base_dir / 'database'
-        self.monthly_data_path = self.database_dir / 'monthly_data.csv'
-        self.output_path = self.database_dir / 'comfort_cities.json'
-
-    def process_comfort_cities(self):
-        try:
-            monthly_data = pd.read_csv(self.monthly_data_path)
-            logger.info(f"Loaded monthly data with shape: {monthly_data.shape}")
-
-            comfort_cities = {}
-            
-            for month in range(1, 13):
-                if month == 12:
-                    month_str = "2023-12"
-                else:
-                    month_str = f"2024-{month:02d}"
-                
-                month_data = monthly_data[monthly_data['年月'] == month_str]
-                
-                comfort_cities_data = month_data[month_data['舒适天数'] > 1].apply(
-                    lambda row: {
-                        'name': row['城市'],
-                        'value': [float(row['经度']), float(row['纬度'])],
-                        'comfort_days': float(row['舒适天数'])
-                    }, axis=1
-                ).tolist()
-                
-                comfort_cities[str(month)] = comfort_cities_data
-                logger.info(f"Month {month}: Found {len(comfort_cities_data)} comfortable cities")
-
-            with open(self.output_path, 'w', encoding='utf-8') as f:
-                json.dump(comfort_cities, f, ensure_ascii=False, indent=2)
-            
-            logger.info(f"Comfort cities data saved to {self.output_path}")
-            
-            return comfort_cities
-
-        except Exception as e:
-            logger.error(f"Error processing comfort cities: {e}")
-            return None
-
-if __name__ == "__main__":
-    processor = ComfortCitiesProcessor()
-    processor.process_comfort_cities() 
\ No newline at end of file
+import os
+import json
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class ComfortCitiesProcessor:
+    def __init__(self):
+        self.base_dir = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.database_dir = self.base_dir / 'database'
+        self.monthly_data_path = self.database_dir / 'monthly_data.csv'
+        self.output_path = self.database_dir / 'comfort_cities.json'
+        self.shard_dir = self.database_dir / 'comfort_cities'
+        self.shard_index_path = self.shard_dir / 'index.json'
+
+    def build_month_shards(self, monthly_data, min_comfort_days=2):
+        """Comfortable-city points for every year-month in one grouped pass
+
+        Cities with at least ``min_comfort_days`` comfortable days are kept.
+        Each shard is columnar (cities, coordinates, comfort_days) with
+        coordinates rounded to 0.01°.
+        """
+        selected = monthly_data[monthly_data['舒适天数'] >= min_comfort_days]
+        selected = selected.sort_values('年月', kind='mergesort')
+
+        shards = {}
+        for month, group in selected.groupby('年月', sort=False):
+            coordinates = np.round(group[['经度', '纬度']].to_numpy(dtype=float), 2)
+            shards[month] = {
+                'month': month,
+                'cities': group['城市'].tolist(),
+                'coordinates': coordinates.tolist(),
+                'comfort_days': group['舒适天数'].astype(int).tolist(),
+            }
+        for month in monthly_data['年月'].unique():
+            shards.setdefault(month, {'month': month, 'cities': [], 'coordinates': [], 'comfort_days': []})
+        return dict(sorted(shards.items()))
+
+    def calendar_months(self, months):
+        """Calendar month number ('1'-'12') -> latest year-month present"""
+        calendar = {}
+        for month in sorted(months):
+            calendar[str(int(month[5:7]))] = month
+        return dict(sorted(calendar.items(), key=lambda item: int(item[0])))
+
+    def write_json(self, path, data):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
+    def process_comfort_cities(self):
+        try:
+            monthly_data = pd.read_csv(self.monthly_data_path)
+            logger.info(f"Loaded monthly data with shape: {monthly_data.shape}")
+
+            shards = self.build_month_shards(monthly_data)
+            calendar = self.calendar_months(shards)
+
+            self.shard_dir.mkdir(exist_ok=True)
+            for stale in self.shard_dir.glob('*.json'):
+                if stale.stem not in shards and stale != self.shard_index_path:
+                    stale.unlink()
+            for month, shard in shards.items():
+                self.write_json(self.shard_dir / f'{month}.json', shard)
+                logger.info(f"Month {month}: Found {len(shard['cities'])} comfortable cities")
+            self.write_json(self.shard_index_path, {'months': list(shards), 'calendar': calendar})
+
+            # 兼容旧格式: 以自然月 1-12 为键（多年数据取最近一年）的点列表，舒适天数保持浮点数
+            comfort_cities = {
+                key: [
+                    {'name': name, 'value': value, 'comfort_days': float(days)}
+                    for name, value, days in zip(
+                        shards[month]['cities'], shards[month]['coordinates'], shards[month]['comfort_days']
+                    )
+                ]
+                for key, month in calendar.items()
+            }
+            self.write_json(self.output_path, comfort_cities)
+            
+            logger.info(f"Comfort cities data saved to {self.shard_dir} and {self.output_path}")
+            
+            return comfort_cities
+
+        except Exception as e:
+            logger.error(f"Error processing comfort cities: {e}")
+            return None
+
+if __name__ == "__main__":
+    processor = ComfortCitiesProcessor()
+    processor.process_comfort_cities() 
@@ -0,0 +1,149 @@
+import os
+import logging
+from pathlib import Path
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 前缀和数组: 名称 -> 累加的每日取值
+PREFIX_ARRAYS = ['comfort_days', 'temp_days', 'temp_sum', 'aqi_days', 'aqi_sum']
+
+class ComfortIndexProcessor:
+    """Build per-city prefix-sum arrays over a dense daily calendar.
+
+    For every city the index stores cumulative comfort-day counts and
+    cumulative mean-temperature / AQI sums (with their valid-day counts), laid
+    out as ``(n_cities, n_days + 1)`` arrays. Any date-range count or mean is
+    then ``cum[:, end + 1] - cum[:, start]``.
+    """
+
+    def __init__(self):
+        self.base_dir = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.database_dir = self.base_dir / 'database'
+        self.daily_data_path = self.database_dir / 'daily_data.csv'
+        self.index_path = self.database_dir / 'comfort_index.npz'
+
+    def build_index(self, daily_df=None):
+        """Build the prefix-sum index from the daily data"""
+        import pandas as pd
+        from processor.process_city_index import CityIndexProcessor
+
+        try:
+            if daily_df is None:
+                daily_df = pd.read_csv(self.daily_data_path)
+            df = CityIndexProcessor().prepare_daily_frame(
+                daily_df[['城市', '日期', '最高温', '最低温', '空气质量指数', '舒适度']]
+            )
+            df = df.dropna(subset=['日期']).drop_duplicates(subset=['城市', '日期'], keep='last')
+
+            city_codes, cities = pd.factorize(df['城市'], sort=True)
+            start = df['日期'].min().normalize()
+            day_offsets = (df['日期'] - start).dt.days.to_numpy()
+            n_cities, n_days = len(cities), int(day_offsets.max()) + 1
+
+            temperature = df['平均温度'].to_numpy(dtype=float)
+            aqi = df['空气质量指数'].to_numpy(dtype=float)
+            daily_values = {
+                'comfort_days': (df['舒适度'] == '舒适').to_numpy(dtype=float),
+                'temp_days': np.isfinite(temperature).astype(float),
+                'temp_sum': np.nan_to_num(temperature),
+                'aqi_days': np.isfinite(aqi).astype(float),
+                'aqi_sum': np.nan_to_num(aqi),
+            }
+
+            arrays = {}
+            for name in PREFIX_ARRAYS:
+                dense = np.zeros((n_cities, n_days + 1))
+                dense[city_codes, day_offsets + 1] = daily_values[name]
+                cumulative = np.cumsum(dense, axis=1)
+                arrays[name] = cumulative.astype(np.int32) if name.endswith('_days') else cumulative
+
+            np.savez(
+                self.index_path,
+                cities=np.asarray(cities, dtype=str),
+                start_date=np.datetime64(start.date(), 'D'),
+                **arrays
+            )
+            logger.info(f"Comfort prefix-sum index built for {n_cities} cities over {n_days} days. "
+                        f"Output saved to: {self.index_path}")
+            return self.index_path
+
+        except Exception as e:
+            logger.error(f"Error building comfort index: {e}")
+            raise
+
+class ComfortRangeIndex:
+    """Answer date-range comfort queries from the prefix-sum index"""
+
+    def __init__(self, index_path=None):
+        if index_path is None:
+            index_path = ComfortIndexProcessor().index_path
+        with np.load(index_path) as data:
+            self.cities = data['cities']
+            self.start_date = data['start_date']
+            self.arrays = {name: data[name] for name in PREFIX_ARRAYS}
+        self.n_days = self.arrays['comfort_days'].shape[1] - 1
+        self.city_rows = {city: i for i, city in enumerate(self.cities.tolist())}
+
+    @property
+    def end_date(self):
+        return self.start_date + np.timedelta64(self.n_days - 1, 'D')
+
+    def _offset(self, date):
+        return int((np.datetime64(date, 'D') - self.start_date).astype(int))
+
+    def query(self, start, end, cities=None):
+        """Comfort days and mean temperature/AQI for each city in [start, end]
+
+        Dates are inclusive and clipped to the indexed period. Returns a dict
+        of aligned arrays; unknown cities are ignored.
+        """
+        first = min(max(self._offset(start), 0), self.n_days)
+        last = min(max(self._offset(end) + 1, 0), self.n_days)
+        last = max(last, first)
+
+        if cities is None:
+            rows = np.arange(len(self.cities))
+        else:
+            rows = np.array([self.city_rows[city] for city in cities if city in self.city_rows], dtype=int)
+
+        window = {
+            name: values[rows, last] - values[rows, first]
+            for name, values in self.arrays.items()
+        }
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg_temp = np.where(window['temp_days'] > 0, window['temp_sum'] / window['temp_days'], np.nan)
+            avg_aqi = np.where(window['aqi_days'] > 0, window['aqi_sum'] / window['aqi_days'], np.nan)
+
+        return {
+            'cities': self.cities[rows],
+            'comfort_days': window['comfort_days'],
+            'days': window['temp_days'],
+            'avg_temperature': avg_temp,
+            'avg_aqi': avg_aqi,
+        }
+
+    def query_records(self, start, end, cities=None):
+        """Same as ``query`` but as JSON-ready records"""
+        result = self.query(start, end, cities)
+        return [
+            {
+                'city': city,
+                'comfort_days': int(comfort_days),
+                'days': int(days),
+                'avg_temperature': None if np.isnan(temp) else round(float(temp), 2),
+                'avg_aqi': None if np.isnan(aqi) else round(float(aqi), 2),
+            }
+            for city, comfort_days, days, temp, aqi in zip(
+                result['cities'].tolist(), result['comfort_days'], result['days'],
+                result['avg_temperature'], result['avg_aqi']
+            )
+        ]
+
+if __name__ == "__main__":
+    import sys
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+    processor = ComfortIndexProcessor()
+    processor.build_index()
@@ -0,0 +1,139 @@
+import os
+import logging
+from pathlib import Path
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 温度直方图的取值范围与分箱宽度（原始数据为整数温度，平均温为0.5的倍数）
+BIN_START = -50.0
+BIN_WIDTH = 0.5
+BIN_COUNT = 201
+
+# 可用于判定舒适度的温度口径
+BASES = ['low', 'high', 'mean']
+
+class ComfortThresholdProcessor:
+    """Build per-city-month temperature histograms for what-if comfort thresholds.
+
+    For each basis (daily low, high and mean temperature) the daily values of
+    every city-month are counted into fixed 0.5°C bins and stored cumulatively
+    over the bins, so the number of days inside any [low, high] window is two
+    lookups for all cities and months at once.
+    """
+
+    def __init__(self):
+        self.base_dir = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.database_dir = self.base_dir / 'database'
+        self.daily_data_path = self.database_dir / 'daily_data.csv'
+        self.index_path = self.database_dir / 'comfort_thresholds.npz'
+
+    def build_index(self, daily_df=None):
+        """Build the cumulative temperature histograms from the daily data"""
+        import pandas as pd
+
+        try:
+            if daily_df is None:
+                daily_df = pd.read_csv(self.daily_data_path)
+            df = daily_df[['城市', '日期', '最高温', '最低温', '经度', '纬度']].drop_duplicates(
+                subset=['城市', '日期'], keep='last'
+            )
+            year_month = pd.to_datetime(df['日期']).dt.strftime('%Y-%m')
+
+            city_codes, cities = pd.factorize(df['城市'], sort=True)
+            month_codes, months = pd.factorize(year_month, sort=True)
+            n_cities, n_months = len(cities), len(months)
+
+            temperatures = {
+                'low': df['最低温'].to_numpy(dtype=float),
+                'high': df['最高温'].to_numpy(dtype=float),
+                'mean': ((df['最高温'] + df['最低温']) / 2).to_numpy(dtype=float),
+            }
+
+            cumulative = np.zeros((len(BASES), n_cities, n_months, BIN_COUNT + 1), dtype=np.int16)
+            for b, basis in enumerate(BASES):
+                values = temperatures[basis]
+                valid = np.isfinite(values)
+                bins = np.clip(np.rint((values[valid] - BIN_START) / BIN_WIDTH), 0, BIN_COUNT - 1).astype(int)
+                cell = (city_codes[valid] * n_months + month_codes[valid]) * BIN_COUNT + bins
+                counts = np.bincount(cell, minlength=n_cities * n_months * BIN_COUNT)
+                counts = counts.reshape(n_cities, n_months, BIN_COUNT)
+                cumulative[b, :, :, 1:] = np.cumsum(counts, axis=2)
+
+            coords = df.groupby('城市')[['经度', '纬度']].first().reindex(cities)
+            np.savez_compressed(
+                self.index_path,
+                cities=np.asarray(cities, dtype=str),
+                months=np.asarray(months, dtype=str),
+                coordinates=coords.to_numpy(dtype=float),
+                cumulative=cumulative
+            )
+            logger.info(f"Comfort threshold histograms built for {n_cities} cities x {n_months} months. "
+                        f"Output saved to: {self.index_path}")
+            return self.index_path
+
+        except Exception as e:
+            logger.error(f"Error building comfort threshold index: {e}")
+            raise
+
+class ComfortThresholdIndex:
+    """Count comfortable days for arbitrary temperature thresholds"""
+
+    def __init__(self, index_path=None):
+        if index_path is None:
+            index_path = ComfortThresholdProcessor().index_path
+        with np.load(index_path) as data:
+            self.cities = data['cities']
+            self.months = data['months']
+            self.coordinates = data['coordinates']
+            self.cumulative = data['cumulative']
+        self.month_columns = {month: i for i, month in enumerate(self.months.tolist())}
+
+    def resolve_month(self, month):
+        """Accept 'YYYY-MM' or a calendar month number (latest matching year)"""
+        month = str(month)
+        if month in self.month_columns:
+            return month
+        if month.isdigit() and 1 <= int(month) <= 12:
+            suffix = f'-{int(month):02d}'
+            matches = [m for m in self.months.tolist() if m.endswith(suffix)]
+            if matches:
+                return matches[-1]
+        raise ValueError(f"Month not in index: {month}")
+
+    def count(self, low, high, basis='low', months=None):
+        """Days with low <= temperature <= high, shape (n_cities, n_months)
+
+        ``months`` selects and orders the month columns (default: all).
+        """
+        if basis not in BASES:
+            raise ValueError(f"Unknown temperature basis: {basis}")
+        first = int(np.ceil((float(low) - BIN_START) / BIN_WIDTH))
+        last = int(np.floor((float(high) - BIN_START) / BIN_WIDTH)) + 1
+        first = min(max(first, 0), BIN_COUNT)
+        last = min(max(last, first), BIN_COUNT)
+
+        cumulative = self.cumulative[BASES.index(basis)]
+        if months is not None:
+            cumulative = cumulative[:, [self.month_columns[self.resolve_month(m)] for m in months]]
+        return cumulative[:, :, last].astype(int) - cumulative[:, :, first]
+
+    def comfort_cities(self, low, high, basis='low', month=None, min_days=2):
+        """Cities with at least ``min_days`` comfortable days in a month, in map-point form"""
+        month = self.resolve_month(month if month is not None else self.months[-1])
+        days = self.count(low, high, basis, months=[month])[:, 0]
+        selected = np.flatnonzero((days >= min_days) & np.isfinite(self.coordinates).all(axis=1))
+        return month, [
+            {
+                'name': self.cities[i],
+                'value': [round(float(self.coordinates[i, 0]), 2), round(float(self.coordinates[i, 1]), 2)],
+                'comfort_days': int(days[i]),
+            }
+            for i in selected.tolist()
+        ]
+
+if __name__ == "__main__":
+    processor = ComfortThresholdProcessor()
+    processor.build_index()
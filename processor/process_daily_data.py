@@ -1,269 +1,442 @@
-import os
-import sys
-import logging
-from pathlib import Path
-import time
-
-import re
-import chardet
-import pandas as pd
-import numpy as np
-
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-class WeatherDataProcessor:
-    def __init__(self):
-        self.base_dir = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        self.data_dir = self.base_dir / 'data'
-        self.weather_dir = self.data_dir / 'cities_weather'
-        self.coord_file = self.data_dir / 'cities_coordinate.xls'
-        self.database_dir = self.base_dir / 'database'
-        self.city_file = self.data_dir / 'city.txt'
-        self.province_file = self.data_dir / 'province.txt'
-
-        if not self.weather_dir.exists():
-            raise FileNotFoundError(f"Weather directory not found at: {self.weather_dir}")
-        if not self.coord_file.exists():
-            raise FileNotFoundError(f"Coordinates file not found at: {self.coord_file}")
-        if not self.database_dir.exists():
-            os.makedirs(self.database_dir)
-        if not self.city_file.exists():
-            raise FileNotFoundError(f"City file not found at: {self.city_file}")
-        if not self.province_file.exists():
-            raise FileNotFoundError(f"Province file not found at: {self.province_file}")
-        
-        logger.info(f"Initialized with data directory: {self.data_dir}")
-        logger.info(f"Weather data directory: {self.weather_dir}")
-        logger.info(f"Coordinates file: {self.coord_file}")
-        logger.info(f"Database directory: {self.database_dir}")
-
-    def detect_file_encoding(self, file_path):
-        """Detect the encoding of a file"""
-        with open(file_path, 'rb') as f:
-            raw_data = f.read()
-            result = chardet.detect(raw_data)
-            return result['encoding']
-
-    def load_csv_with_encoding(self, file_path):
-        """load CSV file"""
-        encodings = ['utf-8', 'gb2312', 'gbk', 'gb18030']
-        
-        detected_encoding = self.detect_file_encoding(file_path)
-        if detected_encoding:
-            encodings.insert(0, detected_encoding)
-        
-        for encoding in encodings:
-            try:
-                return pd.read_csv(file_path, encoding=encoding)
-            except UnicodeDecodeError:
-                continue
-            except Exception as e:
-                logger.error(f"Error reading {file_path} with {encoding}: {e}")
-                continue
-        
-        raise ValueError(f"Failed to read {file_path} with any encoding")
-
-    def load_all_weather_data(self):
-        """Load and combine all weather data"""
-        logger.info("Loading weather data from all cities...")
-        all_data = []
-        id_counter = 0
-
-        for city_dir in self.weather_dir.iterdir():
-            if city_dir.is_dir():
-                city_name = city_dir.name
-                logger.info(f"Processing city: {city_name}")
-                for csv_file in city_dir.glob('*.csv'):
-                    try:
-                        df = self.load_csv_with_encoding(csv_file)
-                        
-                        df['城市'] = city_name
-                        df['id'] = range(id_counter, id_counter + len(df))
-                        id_counter += len(df)
-                        all_data.append(df)
-                    except Exception as e:
-                        logger.error(f"Error loading {csv_file}: {e}")
-                        continue
-
-        if not all_data:
-            raise ValueError("No weather data files were found or loaded successfully")
-
-        combined_df = pd.concat(all_data, ignore_index=True)
-        return combined_df
-
-    def load_coordinates(self):
-        """Load city coordinates data"""
-        logger.info("Loading city coordinates...")
-        try:
-            coords_df = pd.read_excel(self.coord_file, header=2)
-            coords_df['城市（地区）'] = coords_df['城市（地区）'].str.strip()
-            
-            coords_df = coords_df.rename(columns={
-                '城市（地区）': '城市'
-            })
-            
-            coords_df['经度'] = pd.to_numeric(coords_df['经度'], errors='coerce')
-            coords_df['纬度'] = pd.to_numeric(coords_df['纬度'], errors='coerce')
-            
-            coords_df = coords_df.dropna(subset=['经度', '纬度'])
-            
-            logger.info(f"Loaded coordinates for {len(coords_df)} cities")
-            return coords_df
-        except Exception as e:
-            logger.error(f"Error loading coordinates file: {e}")
-            raise
-
-    def clean_temperature(self, temp_str):
-        """Convert temperature string to float"""
-        if pd.isna(temp_str):
-            return np.nan
-        return float(temp_str.replace('°', ''))
-
-    def split_wind_info(self, wind_str):
-        """Split wind information into direction and speed"""
-        if pd.isna(wind_str):
-            return pd.Series({'风向': np.nan, '风力': np.nan})
-        
-        match = re.match(r'([东南西北]+)风(\d+)级', wind_str)
-        if match:
-            return pd.Series({'风向': match.group(1), '风力': int(match.group(2))})
-        return pd.Series({'风向': np.nan, '风力': np.nan})
-
-    def get_comfort_level(self, temp):
-        """Determine comfort level based on temperature"""
-        if pd.isna(temp):
-            return 'Unknown'
-        if temp < 18:
-            return '较冷'
-        elif temp > 25:
-            return '较热'
-        else:
-            return '舒适'
-
-    def load_city_province_mapping(self):
-        """Load and create city-province mapping"""
-        logger.info("Loading city-province mapping...")
-        try:
-            city_df = None
-            province_df = None
-            
-            encodings = ['utf-8', 'gb2312', 'gbk', 'gb18030']
-            detected_encoding = self.detect_file_encoding(self.city_file)
-            if detected_encoding:
-                encodings.insert(0, detected_encoding)
-                
-            for encoding in encodings:
-                try:
-                    city_df = pd.read_csv(self.city_file, sep='\t', header=None, 
-                                        names=['city_code', 'city_name', 'province_code'],
-                                        encoding=encoding)
-                    break
-                except UnicodeDecodeError:
-                    continue
-                
-            if city_df is None:
-                raise ValueError("Failed to read city.txt with any encoding")
-            
-            detected_encoding = self.detect_file_encoding(self.province_file)
-            if detected_encoding:
-                encodings.insert(0, detected_encoding)
-                
-            for encoding in encodings:
-                try:
-                    province_df = pd.read_csv(self.province_file, sep='\t', header=None,
-                                            names=['province_code', 'province_name', 'extra'],
-                                            encoding=encoding)
-                    break
-                except UnicodeDecodeError:
-                    continue
-                
-            if province_df is None:
-                raise ValueError("Failed to read province.txt with any encoding")
-            
-            mapping_df = pd.merge(city_df, province_df[['province_code', 'province_name']], 
-                                on='province_code', how='left')
-            
-            city_to_province = dict(zip(mapping_df['city_name'], mapping_df['province_name']))
-            
-            logger.info(f"Successfully loaded city-province mapping for {len(city_to_province)} cities")
-            return city_to_province
-            
-        except Exception as e:
-            logger.error(f"Error loading city-province mapping: {e}")
-            raise
-
-    def process_city_name(self, city_name):
-        """Process city name to ensure consistent format"""
-        if city_name.endswith('县市'):
-            city_name = city_name[:-2] + '市'
-        elif city_name.endswith('地区市'):
-            city_name = city_name[:-3] + '市'
-        return city_name
-
-    def process_data(self):
-        """Main data processing function"""
-        try:
-            df = self.load_all_weather_data()
-            
-            city_to_province = self.load_city_province_mapping()
-            
-            coords_df = self.load_coordinates()
-            df = pd.merge(df, coords_df, on='城市', how='left')
-            
-            df['城市'] = df['城市'].apply(lambda x: x + '市' if not x.endswith('市') else x)
-            df['城市'] = df['城市'].apply(self.process_city_name)
-            df['省份'] = df['城市'].map(city_to_province)
-            
-            df[['日期', '星期']] = df['日期'].str.extract(r'(\d{4}-\d{2}-\d{2})\s+(.+)')
-            
-            df['最高温'] = df['最高温'].apply(self.clean_temperature)
-            df['最低温'] = df['最低温'].apply(self.clean_temperature)
-            
-            wind_info = df['风力风向'].apply(self.split_wind_info)
-            df = pd.concat([df, wind_info], axis=1)
-            
-            df['舒适度'] = df['最低温'].apply(self.get_comfort_level)
-            
-            missing_coords = df[df['经度'].isna()]['城市'].unique()
-            if len(missing_coords) > 0:
-                logger.warning(f"Cities missing coordinates: {missing_coords.tolist()}")
-            
-            output_df = df[[ 
-                'id', '城市', '省份', '日期', '星期', '最高温', '最低温', 
-                '天气', '风力', '风向', '空气质量指数',
-                '经度', '纬度', '舒适度'
-            ]]
-
-            output_file_path = self.database_dir / 'daily_data.csv'
-            
-            try:
-                os.makedirs(self.database_dir, exist_ok=True)
-                os.chmod(self.database_dir, 0o777)
-                
-                if output_file_path.exists():
-                    output_file_path.unlink()
-                
-                output_df.to_csv(output_file_path, index=False, encoding='utf-8-sig')
-                
-            except PermissionError as pe:
-                alt_output_path = self.base_dir / f'daily_temperature_data_{int(time.time())}.csv'
-                logger.warning(f"Permission denied at {output_file_path}, trying alternative path: {alt_output_path}")
-                output_df.to_csv(alt_output_path, index=False, encoding='utf-8-sig')
-                output_file_path = alt_output_path
-
-            logger.info(f"Data processing completed successfully. Output saved to: {output_file_path}")
-            return output_df
-
-        except Exception as e:
-            logger.error(f"Error during processing: {e}")
-            raise
-
-if __name__ == "__main__":
-    try:
-        processor = WeatherDataProcessor()
-        output_df = processor.process_data()
-        logger.info("Processing completed successfully")
-    except Exception as e:
-        logger.error(f"Error during processing: {e}")
+import os
+import sys
+import json
+import logging
+from pathlib import Path
+import time
+
+import re
+import pandas as pd
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class WeatherDataProcessor:
+    def __init__(self):
+        self.base_dir = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.data_dir = self.base_dir / 'data'
+        self.weather_dir = self.data_dir / 'cities_weather'
+        self.coord_file = self.data_dir / 'cities_coordinate.xls'
+        self.database_dir = self.base_dir / 'database'
+        self.city_file = self.data_dir / 'city.txt'
+        self.province_file = self.data_dir / 'province.txt'
+        self.dim_city_path = self.database_dir / 'dim_city.csv'
+        self.dim_province_path = self.database_dir / 'dim_province.csv'
+        self.quarantine_path = self.database_dir / 'quarantine.csv'
+        self.reference_cache_dir = self.database_dir / 'reference_cache'
+        # 输出CSV的压缩副本格式（None、'gzip' 或 'zstd'），由流水线设置
+        self.compression = None
+
+        if not self.weather_dir.exists():
+            raise FileNotFoundError(f"Weather directory not found at: {self.weather_dir}")
+        if not self.coord_file.exists():
+            raise FileNotFoundError(f"Coordinates file not found at: {self.coord_file}")
+        if not self.database_dir.exists():
+            os.makedirs(self.database_dir)
+        if not self.city_file.exists():
+            raise FileNotFoundError(f"City file not found at: {self.city_file}")
+        if not self.province_file.exists():
+            raise FileNotFoundError(f"Province file not found at: {self.province_file}")
+        
+        logger.info(f"Initialized with data directory: {self.data_dir}")
+        logger.info(f"Weather data directory: {self.weather_dir}")
+        logger.info(f"Coordinates file: {self.coord_file}")
+        logger.info(f"Database directory: {self.database_dir}")
+
+    def detect_file_encoding(self, file_path):
+        """Detect the encoding of a file"""
+        import chardet
+        with open(file_path, 'rb') as f:
+            raw_data = f.read()
+            result = chardet.detect(raw_data)
+            return result['encoding']
+
+    def load_csv_with_encoding(self, file_path):
+        """load CSV file"""
+        encodings = ['utf-8', 'gb2312', 'gbk', 'gb18030']
+        
+        detected_encoding = self.detect_file_encoding(file_path)
+        if detected_encoding:
+            encodings.insert(0, detected_encoding)
+        
+        for encoding in encodings:
+            try:
+                return pd.read_csv(file_path, encoding=encoding)
+            except UnicodeDecodeError:
+                continue
+            except Exception as e:
+                logger.error(f"Error reading {file_path} with {encoding}: {e}")
+                continue
+        
+        raise ValueError(f"Failed to read {file_path} with any encoding")
+
+    def load_all_weather_data(self, months=None, id_start=0):
+        """Load and combine all weather data, or only the files of the given 'YYYY-MM' months"""
+        logger.info("Loading weather data from all cities...")
+        all_data = []
+        id_counter = id_start
+        wanted = None if months is None else {month.replace('-', '') for month in months}
+
+        for city_dir in self.weather_dir.iterdir():
+            if city_dir.is_dir():
+                city_name = city_dir.name
+                logger.info(f"Processing city: {city_name}")
+                for csv_file in city_dir.glob('*.csv'):
+                    if wanted is not None and csv_file.stem not in wanted:
+                        continue
+                    try:
+                        df = self.load_csv_with_encoding(csv_file)
+                        
+                        df['城市'] = city_name
+                        # 文件名 YYYYMM 即该文件数据所属的月份，用于校验日期范围
+                        stem = csv_file.stem
+                        df['来源月份'] = f'{stem[:4]}-{stem[4:]}' if re.fullmatch(r'\d{6}', stem) else None
+                        df['id'] = range(id_counter, id_counter + len(df))
+                        id_counter += len(df)
+                        all_data.append(df)
+                    except Exception as e:
+                        logger.error(f"Error loading {csv_file}: {e}")
+                        continue
+
+        if not all_data:
+            if months is not None:
+                # 增量运行时这些月份的原始文件已全部删除：返回空表，由调用方移除这些月份的数据
+                logger.warning(f"No raw files left for months {months}, their rows will be removed")
+                from processor.daily_validation import RAW_COLUMNS
+                return pd.DataFrame(columns=RAW_COLUMNS + ['城市', '来源月份', 'id'])
+            raise ValueError("No weather data files were found or loaded successfully")
+
+        combined_df = pd.concat(all_data, ignore_index=True)
+        return combined_df
+
+    def source_signature(self, paths):
+        """Size and modification time of reference source files"""
+        signature = {}
+        for path in paths:
+            stat = path.stat()
+            signature[path.name] = [stat.st_size, stat.st_mtime_ns]
+        return json.dumps(signature, sort_keys=True)
+
+    def load_reference_cache(self, name, sources, build):
+        """Load a compiled reference lookup, rebuilding it when its source files change
+
+        ``build`` parses the sources into a dict of NumPy arrays, which is
+        stored as ``reference_cache/<name>.npz`` together with the sources'
+        size/mtime.
+        """
+        cache_path = self.reference_cache_dir / f'{name}.npz'
+        signature = self.source_signature(sources)
+        if cache_path.exists():
+            with np.load(cache_path) as data:
+                if str(data['source']) == signature:
+                    return {key: data[key] for key in data.files if key != 'source'}
+
+        arrays = build()
+        self.reference_cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_name(f'{name}.tmp.npz')
+        np.savez(tmp_path, source=signature, **arrays)
+        os.replace(tmp_path, cache_path)
+        logger.info(f"Reference cache rebuilt: {cache_path}")
+        return arrays
+
+    def load_coordinates(self):
+        """Load city coordinates data from the compiled reference cache"""
+        logger.info("Loading city coordinates...")
+        try:
+            arrays = self.load_reference_cache('coordinates', [self.coord_file], self.compile_coordinates)
+            coords_df = pd.DataFrame({
+                '城市': arrays['names'],
+                '经度': arrays['longitudes'],
+                '纬度': arrays['latitudes'],
+            })
+            
+            logger.info(f"Loaded coordinates for {len(coords_df)} cities")
+            return coords_df
+        except Exception as e:
+            logger.error(f"Error loading coordinates file: {e}")
+            raise
+
+    def compile_coordinates(self):
+        """Parse the coordinates spreadsheet into name/longitude/latitude arrays"""
+        coords_df = self.parse_coordinates()
+        return {
+            'names': coords_df['城市'].to_numpy(dtype=str),
+            'longitudes': coords_df['经度'].to_numpy(dtype=float),
+            'latitudes': coords_df['纬度'].to_numpy(dtype=float),
+        }
+
+    def parse_coordinates(self):
+        """Parse city coordinates from the .xls source file"""
+        try:
+            coords_df = pd.read_excel(self.coord_file, header=2)
+            coords_df['城市（地区）'] = coords_df['城市（地区）'].str.strip()
+            
+            coords_df = coords_df.rename(columns={
+                '城市（地区）': '城市'
+            })
+            
+            coords_df['经度'] = pd.to_numeric(coords_df['经度'], errors='coerce')
+            coords_df['纬度'] = pd.to_numeric(coords_df['纬度'], errors='coerce')
+            
+            coords_df = coords_df.dropna(subset=['城市', '经度', '纬度'])
+            return coords_df[['城市', '经度', '纬度']]
+        except Exception as e:
+            logger.error(f"Error parsing coordinates file: {e}")
+            raise
+
+    def get_comfort_levels(self, temps):
+        """Determine comfort levels of a temperature column (below 18 较冷, above 25 较热)"""
+        values = temps.to_numpy(dtype=float)
+        levels = np.select([np.isnan(values), values < 18, values > 25],
+                           ['Unknown', '较冷', '较热'], default='舒适')
+        return pd.Series(levels, index=temps.index, dtype='str')
+
+    def load_city_province_mapping(self):
+        """Load the city-province mapping from the compiled reference cache"""
+        logger.info("Loading city-province mapping...")
+        arrays = self.load_reference_cache(
+            'city_province', [self.city_file, self.province_file], self.compile_city_province_mapping
+        )
+        city_to_province = dict(zip(arrays['cities'].tolist(), arrays['provinces'].tolist()))
+        logger.info(f"Successfully loaded city-province mapping for {len(city_to_province)} cities")
+        return city_to_province
+
+    def compile_city_province_mapping(self):
+        """Parse the mapping into aligned city/province arrays, dropping cities without a province"""
+        city_to_province = self.parse_city_province_mapping()
+        pairs = [(city, province) for city, province in city_to_province.items() if not pd.isna(province)]
+        return {
+            'cities': np.array([city for city, _ in pairs], dtype=str),
+            'provinces': np.array([province for _, province in pairs], dtype=str),
+        }
+
+    def parse_city_province_mapping(self):
+        """Parse city.txt and province.txt into a city-province mapping"""
+        try:
+            city_df = None
+            province_df = None
+            
+            encodings = ['utf-8', 'gb2312', 'gbk', 'gb18030']
+            detected_encoding = self.detect_file_encoding(self.city_file)
+            if detected_encoding:
+                encodings.insert(0, detected_encoding)
+                
+            for encoding in encodings:
+                try:
+                    city_df = pd.read_csv(self.city_file, sep='\t', header=None, 
+                                        names=['city_code', 'city_name', 'province_code'],
+                                        encoding=encoding)
+                    break
+                except UnicodeDecodeError:
+                    continue
+                
+            if city_df is None:
+                raise ValueError("Failed to read city.txt with any encoding")
+            
+            detected_encoding = self.detect_file_encoding(self.province_file)
+            if detected_encoding:
+                encodings.insert(0, detected_encoding)
+                
+            for encoding in encodings:
+                try:
+                    province_df = pd.read_csv(self.province_file, sep='\t', header=None,
+                                            names=['province_code', 'province_name', 'extra'],
+                                            encoding=encoding)
+                    break
+                except UnicodeDecodeError:
+                    continue
+                
+            if province_df is None:
+                raise ValueError("Failed to read province.txt with any encoding")
+            
+            mapping_df = pd.merge(city_df, province_df[['province_code', 'province_name']], 
+                                on='province_code', how='left')
+            
+            city_to_province = dict(zip(mapping_df['city_name'], mapping_df['province_name']))
+            
+            logger.info(f"Parsed city-province mapping for {len(city_to_province)} cities")
+            return city_to_province
+            
+        except Exception as e:
+            logger.error(f"Error loading city-province mapping: {e}")
+            raise
+
+    def process_city_name(self, city_name):
+        """Process city name to ensure consistent format"""
+        if city_name.endswith('县市'):
+            city_name = city_name[:-2] + '市'
+        elif city_name.endswith('地区市'):
+            city_name = city_name[:-3] + '市'
+        return city_name
+
+    def normalize_city_name(self, raw_name):
+        """Canonical city name: '市' suffix appended, then county/prefecture suffixes fixed"""
+        return self.process_city_name(raw_name if raw_name.endswith('市') else raw_name + '市')
+
+    def load_dimension_ids(self, path, name_col, id_col):
+        """Name -> id mapping of a previously written dimension table, so ids stay stable across runs"""
+        if not path.exists():
+            return {}
+        dim_df = pd.read_csv(path)
+        return dict(zip(dim_df[name_col], dim_df[id_col].astype(int)))
+
+    def assign_ids(self, names, previous):
+        """Keep previously assigned ids and number new names after them in sorted order"""
+        ids = {name: previous[name] for name in names if name in previous}
+        next_id = max(previous.values(), default=-1) + 1
+        for name in sorted(set(names) - set(ids)):
+            ids[name] = next_id
+            next_id += 1
+        return ids
+
+    def build_dimensions(self, raw_names, coords_df, city_to_province):
+        """Build the city and province dimension tables from the raw city folder names
+
+        Names are normalized first; coordinates are matched on the raw name and
+        then on the normalized name, keeping the first row for names that appear
+        more than once in the coordinates file. Cities without coordinates or a
+        province are reported here.
+        """
+        raw_names = sorted(raw_names)
+        normalized = [self.normalize_city_name(name) for name in raw_names]
+        cities = pd.DataFrame({'城市': normalized, '原始名称': raw_names}).drop_duplicates(subset=['城市'])
+
+        coords = coords_df.drop_duplicates(subset=['城市']).set_index('城市')[['经度', '纬度']]
+        matched = coords.reindex(cities['原始名称']).to_numpy()
+        fallback = coords.reindex(cities['城市']).to_numpy()
+        cities[['经度', '纬度']] = np.where(np.isnan(matched), fallback, matched)
+        cities['省份'] = cities['城市'].map(city_to_province)
+
+        province_ids = self.assign_ids(
+            cities['省份'].dropna().unique().tolist(),
+            self.load_dimension_ids(self.dim_province_path, '省份', 'province_id')
+        )
+        city_ids = self.assign_ids(
+            cities['城市'].tolist(),
+            self.load_dimension_ids(self.dim_city_path, '城市', 'city_id')
+        )
+        cities['city_id'] = cities['城市'].map(city_ids)
+        cities['province_id'] = cities['省份'].map(province_ids).astype('Int64')
+
+        dim_city = cities[['city_id', '城市', '原始名称', 'province_id', '省份', '经度', '纬度']]
+        dim_city = dim_city.sort_values('city_id').reset_index(drop=True)
+        dim_province = pd.DataFrame(
+            sorted(((pid, name) for name, pid in province_ids.items())),
+            columns=['province_id', '省份']
+        )
+
+        missing_coords = dim_city.loc[dim_city['经度'].isna(), '城市']
+        if len(missing_coords) > 0:
+            logger.warning(f"Cities missing coordinates: {missing_coords.tolist()}")
+        missing_province = dim_city.loc[dim_city['province_id'].isna(), '城市']
+        if len(missing_province) > 0:
+            logger.warning(f"Cities missing province: {missing_province.tolist()}")
+
+        logger.info(f"Built city dimension with {len(dim_city)} cities in {len(dim_province)} provinces")
+        return dim_city, dim_province
+
+    def write_quarantine(self, quarantined, months=None):
+        """Write quarantined rows, replacing only the given months' rows on incremental runs"""
+        if months is not None and self.quarantine_path.exists():
+            previous = pd.read_csv(self.quarantine_path)
+            previous = previous[~previous['来源月份'].isin(months)]
+            quarantined = pd.concat([previous, quarantined], ignore_index=True)
+        quarantined.to_csv(self.quarantine_path, index=False, encoding='utf-8-sig')
+        if len(quarantined) > 0:
+            logger.warning(f"{len(quarantined)} daily rows quarantined. See: {self.quarantine_path}")
+
+    def load_previous_rows(self, output_file_path, months):
+        """Rows of the existing daily data outside the given months, plus the next free id"""
+        previous = pd.read_csv(output_file_path)
+        next_id = int(previous['id'].max()) + 1 if len(previous) else 0
+        return previous[~previous['日期'].str[:7].isin(months)], next_id
+
+    def process_data(self, months=None):
+        """Main data processing function
+
+        With ``months`` (a list of 'YYYY-MM'), only the raw files of those
+        months are reloaded and replace the same months in the existing daily
+        data; rows of other months keep their ids.
+        """
+        from processor.daily_validation import validate_daily_records
+        from processor.artifact_writer import ArtifactWriter
+
+        try:
+            output_file_path = self.database_dir / 'daily_data.csv'
+            previous = None
+            raw_names = set()
+            if months is not None and output_file_path.exists():
+                previous, next_id = self.load_previous_rows(output_file_path, months)
+                df = self.load_all_weather_data(months, id_start=next_id)
+                # 增量运行只加载部分文件，沿用维度表中已有的城市以免被丢弃
+                if self.dim_city_path.exists():
+                    raw_names = set(pd.read_csv(self.dim_city_path)['原始名称'])
+            else:
+                df = self.load_all_weather_data()
+            
+            city_to_province = self.load_city_province_mapping()
+            
+            coords_df = self.load_coordinates()
+            
+            # 城市名称、坐标与省份统一在维度表中匹配，事实表通过整数键关联
+            dim_city, dim_province = self.build_dimensions(
+                raw_names | set(df['城市'].unique()), coords_df, city_to_province
+            )
+            name_to_id = dict(zip(dim_city['城市'], dim_city['city_id']))
+            raw_to_id = {raw: name_to_id[self.normalize_city_name(raw)] for raw in df['城市'].unique()}
+            df['city_id'] = df['城市'].map(raw_to_id)
+            df = df.drop(columns='城市').join(
+                dim_city.set_index('city_id')[['城市', 'province_id', '省份', '经度', '纬度']], on='city_id'
+            )
+            
+            # 整列校验并解析日期、气温与风力风向，不合格的行连同原因写入隔离文件
+            df, quarantined, _ = validate_daily_records(df, ['city_id'])
+            self.write_quarantine(quarantined, months if previous is not None else None)
+            
+            df['舒适度'] = self.get_comfort_levels(df['最低温'])
+            
+            output_df = df[[ 
+                'id', 'city_id', 'province_id', '城市', '省份', '日期', '星期', '最高温', '最低温', 
+                '天气', '风力', '风向', '空气质量指数',
+                '经度', '纬度', '舒适度'
+            ]]
+
+            if previous is not None:
+                output_df = pd.concat([previous, output_df], ignore_index=True)
+                output_df['province_id'] = output_df['province_id'].astype('Int64')
+                logger.info(f"Replaced daily rows of months: {months}")
+            
+            try:
+                os.makedirs(self.database_dir, exist_ok=True)
+                os.chmod(self.database_dir, 0o777)
+                
+                # 日数据是本阶段最后的计算结果，没有可与之重叠的工作，直接在当前线程分块写出；
+                # 内容未变时保留原文件
+                with ArtifactWriter(self.database_dir, self.compression) as writer:
+                    writer.write_csv(output_df, output_file_path, index=False)
+                dim_city.to_csv(self.dim_city_path, index=False, encoding='utf-8-sig')
+                dim_province.to_csv(self.dim_province_path, index=False, encoding='utf-8-sig')
+                
+            except PermissionError as pe:
+                alt_output_path = self.base_dir / f'daily_temperature_data_{int(time.time())}.csv'
+                logger.warning(f"Permission denied at {output_file_path}, trying alternative path: {alt_output_path}")
+                output_df.to_csv(alt_output_path, index=False, encoding='utf-8-sig')
+                output_file_path = alt_output_path
+
+            logger.info(f"Data processing completed successfully. Output saved to: {output_file_path}")
+            return output_df
+
+        except Exception as e:
+            logger.error(f"Error during processing: {e}")
+            raise
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+    try:
+        processor = WeatherDataProcessor()
+        output_df = processor.process_data()
+        logger.info("Processing completed successfully")
+    except Exception as e:
+        logger.error(f"Error during processing: {e}")
         sys.exit(1) 
\ No newline at end of file
@@ -0,0 +1,165 @@
+import os
+import logging
+from pathlib import Path
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 事件判定阈值
+HEATWAVE_TEMP = 35      # 日最高温 ≥ 35°C 为高温日
+COLD_SPELL_TEMP = -10   # 日最低温 ≤ -10°C 为严寒日
+POLLUTION_AQI = 150     # AQI > 150 为中度及以上污染
+
+# 事件类型: 判定条件、峰值列与取值方向、最短持续天数、月度/年度表中的连续天数列名
+EVENT_TYPES = {
+    '舒适': {
+        'condition': lambda df: df['舒适度'] == '舒适',
+        'peak_column': '最高温',
+        'peak': 'max',
+        'min_length': 1,
+        'streak_column': '最长舒适连续天数',
+    },
+    '高温': {
+        'condition': lambda df: df['最高温'] >= HEATWAVE_TEMP,
+        'peak_column': '最高温',
+        'peak': 'max',
+        'min_length': 3,
+        'streak_column': '最长高温连续天数',
+    },
+    '寒潮': {
+        'condition': lambda df: df['最低温'] <= COLD_SPELL_TEMP,
+        'peak_column': '最低温',
+        'peak': 'min',
+        'min_length': 3,
+        'streak_column': '最长寒潮连续天数',
+    },
+    '污染': {
+        'condition': lambda df: df['空气质量指数'] > POLLUTION_AQI,
+        'peak_column': '空气质量指数',
+        'peak': 'max',
+        'min_length': 2,
+        'streak_column': '最长污染连续天数',
+    },
+}
+
+STREAK_COLUMNS = [event['streak_column'] for event in EVENT_TYPES.values()]
+
+def find_runs(flags, group_codes, day_numbers, values=None, peak='max'):
+    """Maximal runs of consecutive flagged days within each group
+
+    Rows must be sorted by group and then by day, one row per group and day.
+    A run breaks on a new group, an unflagged day or a missing day. Returns a
+    dict of aligned arrays: group, start, end (day numbers), length and, if
+    ``values`` is given, the run's peak value.
+    """
+    rows = np.flatnonzero(np.asarray(flags, dtype=bool))
+    groups = np.asarray(group_codes)[rows]
+    days = np.asarray(day_numbers)[rows]
+
+    # 与前一个标记日同组且日期相邻则延续当前连续段，否则开启新段
+    new_run = np.ones(len(rows), dtype=bool)
+    new_run[1:] = (groups[1:] != groups[:-1]) | (days[1:] != days[:-1] + 1)
+    starts = np.flatnonzero(new_run)
+    # 没有标记日时 starts 为空，ends 也须为空
+    ends = np.append(starts[1:], len(rows))[:len(starts)] - 1
+
+    runs = {
+        'group': groups[starts],
+        'start': days[starts],
+        'end': days[ends],
+        'length': ends - starts + 1,
+    }
+    if values is not None:
+        reduce = np.fmax if peak == 'max' else np.fmin
+        values = np.asarray(values, dtype=float)[rows]
+        runs['peak'] = reduce.reduceat(values, starts) if len(starts) else values[:0]
+    return runs
+
+def find_events(df, group_cols=('城市',)):
+    """Detect every event type over a prepared daily frame in one pass per type
+
+    ``df`` needs datetime 日期 and numeric 空气质量指数 (see
+    ``CityIndexProcessor.prepare_daily_frame``). Runs never cross a change in
+    ``group_cols``, so grouping by (城市, 年月) splits events at month ends.
+    """
+    import pandas as pd
+
+    group_cols = list(group_cols)
+    df = df.dropna(subset=['日期']).drop_duplicates(subset=['城市', '日期'], keep='last')
+    df = df.sort_values(group_cols + ['日期'], kind='mergesort').reset_index(drop=True)
+
+    group_codes = df.groupby(group_cols, sort=False).ngroup().to_numpy()
+    groups = df[group_cols].drop_duplicates().reset_index(drop=True)
+    day_numbers = df['日期'].to_numpy(dtype='datetime64[D]').astype(np.int64)
+
+    frames = []
+    for name, event in EVENT_TYPES.items():
+        flags = event['condition'](df).fillna(False).to_numpy(dtype=bool)
+        runs = find_runs(flags, group_codes, day_numbers,
+                         df[event['peak_column']].to_numpy(dtype=float), event['peak'])
+        keep = runs['length'] >= event['min_length']
+        frame = groups.iloc[runs['group'][keep]].reset_index(drop=True)
+        frame['事件'] = name
+        frame['开始日期'] = runs['start'][keep].astype('datetime64[D]')
+        frame['结束日期'] = runs['end'][keep].astype('datetime64[D]')
+        frame['天数'] = runs['length'][keep]
+        frame['峰值'] = runs['peak'][keep]
+        frames.append(frame)
+
+    columns = group_cols + ['事件', '开始日期', '结束日期', '天数', '峰值']
+    return pd.concat(frames, ignore_index=True)[columns]
+
+def longest_streaks(events, group_cols=('城市',)):
+    """Longest run of each event type per group, one streak column per type"""
+    group_cols = list(group_cols)
+    streaks = events.groupby(group_cols + ['事件'])['天数'].max().unstack('事件')
+    streaks = streaks.reindex(columns=list(EVENT_TYPES)).fillna(0).astype(int)
+    streaks.columns = STREAK_COLUMNS
+    return streaks.reset_index()
+
+class WeatherEventProcessor:
+    """Detect heatwaves, cold spells, pollution episodes and comfort streaks per city"""
+
+    def __init__(self):
+        self.base_dir = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.database_dir = self.base_dir / 'database'
+        self.daily_data_path = self.database_dir / 'daily_data.csv'
+        self.events_path = self.database_dir / 'weather_events.csv'
+
+    def detect_events(self, daily_df=None):
+        """Build the events table from the daily data"""
+        import pandas as pd
+        from processor.process_city_index import CityIndexProcessor
+
+        try:
+            if daily_df is None:
+                daily_df = pd.read_csv(self.daily_data_path)
+            df = CityIndexProcessor().prepare_daily_frame(
+                daily_df[['city_id', '城市', '日期', '最高温', '最低温', '空气质量指数', '舒适度']]
+            )
+            events = find_events(df, ['city_id', '城市'])
+            events.to_csv(self.events_path, index=False, encoding='utf-8-sig', float_format='%.2f')
+
+            counts = events['事件'].value_counts().reindex(list(EVENT_TYPES), fill_value=0)
+            logger.info(f"Weather events detected: {counts.to_dict()}. Output saved to: {self.events_path}")
+            return events
+
+        except Exception as e:
+            logger.error(f"Error detecting weather events: {e}")
+            raise
+
+    def load_events(self):
+        """Load the events table, detecting events first if it was never built"""
+        import pandas as pd
+
+        if not self.events_path.exists():
+            return self.detect_events()
+        return pd.read_csv(self.events_path, parse_dates=['开始日期', '结束日期'])
+
+if __name__ == "__main__":
+    import sys
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+    processor = WeatherEventProcessor()
+    processor.detect_events()
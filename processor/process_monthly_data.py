@@ -1,115 +1,189 @@
-import os
-import pandas as pd
-import numpy as np
-from pathlib import Path
-import logging
-
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-class MonthlyDataProcessor:
-    def __init__(self):
-        self.base_dir = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        self.database_dir = self.base_dir / 'database'
-        self.daily_data_path = self.database_dir / 'daily_data.csv'
-        self.monthly_data_path = self.database_dir / 'monthly_data.csv'
-
-        if not self.daily_data_path.exists():
-            raise FileNotFoundError(f"Daily data file not found at: {self.daily_data_path}")
-
-    def load_daily_data(self):
-        """Load the daily data CSV file"""
-        try:
-            return pd.read_csv(self.daily_data_path)
-        except Exception as e:
-            logger.error(f"Error loading daily data: {e}")
-            raise
-
-    def process_date(self, df):
-        """Process date column to extract year and month"""
-        df['年月'] = pd.to_datetime(df['日期']).dt.strftime('%Y-%m')
-        return df.drop(['日期', '星期'], axis=1)
-
-    def calculate_wind_direction_stats(self, group):
-        """Calculate wind statistics for each direction"""
-        wind_directions = ['东', '南', '西', '北', '东北', '东南', '西南', '西北']
-        wind_stats = {}
-        total_days = len(group)
-        
-        for direction in wind_directions:
-            mask = group['风向'].str.contains(direction, na=False)
-            direction_days = mask.sum()
-            avg_speed = group.loc[mask, '风力'].mean()
-            
-            wind_stats[f'{direction}风频率'] = round(direction_days / total_days * 100, 2)
-            wind_stats[f'{direction}风均速'] = round(float(avg_speed if not pd.isna(avg_speed) else 0), 2)
-            
-        return pd.Series(wind_stats)
-
-    def count_comfort_days(self, comfort_series):
-        """Count number of comfortable days"""
-        return (comfort_series == '舒适').sum()
-
-    def process_monthly_data(self):
-        """Main processing function for monthly data"""
-        try:
-            df = self.load_daily_data()
-            df = self.process_date(df)
-            
-            grouped = df.groupby(['城市', '省份', '年月'])
-            
-            monthly_data = []
-            
-            for (city, province, month), group in grouped:
-                temp_stats = {
-                    '月最高温': round(group['最高温'].max(), 2),
-                    '月最低温': round(group['最低温'].min(), 2),
-                    '月平均温': round((group['最高温'].mean() + group['最低温'].mean()) / 2, 2)
-                }
-                
-                wind_stats = self.calculate_wind_direction_stats(group)
-                
-                avg_aqi = pd.to_numeric(
-                    group['空气质量指数'].str.extract(r'(\d+)', expand=False), 
-                    errors='coerce'
-                ).mean()
-                
-                comfort_days = self.count_comfort_days(group['舒适度'])
-                
-                monthly_record = {
-                    '城市': city,
-                    '省份': province,
-                    '年月': month,
-                    '经度': round(float(group['经度'].iloc[0]), 2),
-                    '纬度': round(float(group['纬度'].iloc[0]), 2),
-                    '舒适天数': comfort_days,
-                    '空气质量指数': round(float(avg_aqi), 2) if not pd.isna(avg_aqi) else None,
-                    **temp_stats,
-                    **wind_stats
-                }
-                
-                monthly_data.append(monthly_record)
-            
-            monthly_df = pd.DataFrame(monthly_data)
-            
-            monthly_df.insert(0, 'id', range(len(monthly_df)))
-            
-            numeric_columns = monthly_df.select_dtypes(include=[np.number]).columns
-            monthly_df[numeric_columns] = monthly_df[numeric_columns].round(2)
-            
-            monthly_df.to_csv(self.monthly_data_path, index=False, encoding='utf-8-sig', float_format='%.2f')
-            
-            logger.info(f"Monthly data processing completed. Output saved to: {self.monthly_data_path}")
-            return monthly_df
-            
-        except Exception as e:
-            logger.error(f"Error processing monthly data: {e}")
-            raise
-
-if __name__ == "__main__":
-    try:
-        processor = MonthlyDataProcessor()
-        monthly_df = processor.process_monthly_data()
-        logger.info("Processing completed successfully")
-    except Exception as e:
-        logger.error(f"Error during processing: {e}")
+import os
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class MonthlyDataProcessor:
+    def __init__(self):
+        self.base_dir = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.database_dir = self.base_dir / 'database'
+        self.daily_data_path = self.database_dir / 'daily_data.csv'
+        self.monthly_data_path = self.database_dir / 'monthly_data.csv'
+        self.column_store_dir = self.database_dir / 'column_store' / 'monthly_data'
+        self.sketch_path = self.database_dir / 'monthly_sketches.npz'
+        # 输出CSV的压缩副本格式（None、'gzip' 或 'zstd'），由流水线设置
+        self.compression = None
+
+        if not self.daily_data_path.exists():
+            raise FileNotFoundError(f"Daily data file not found at: {self.daily_data_path}")
+
+    def load_daily_data(self):
+        """Load the daily data CSV file"""
+        try:
+            return pd.read_csv(self.daily_data_path)
+        except Exception as e:
+            logger.error(f"Error loading daily data: {e}")
+            raise
+
+    def process_date(self, df):
+        """Process date column to extract year and month"""
+        df['年月'] = pd.to_datetime(df['日期']).dt.strftime('%Y-%m')
+        return df.drop(['日期', '星期'], axis=1)
+
+    def calculate_wind_direction_stats(self, group):
+        """Calculate wind statistics for each direction"""
+        wind_directions = ['东', '南', '西', '北', '东北', '东南', '西南', '西北']
+        wind_stats = {}
+        total_days = len(group)
+        
+        for direction in wind_directions:
+            mask = group['风向'].str.contains(direction, na=False)
+            direction_days = mask.sum()
+            avg_speed = group.loc[mask, '风力'].mean()
+            
+            wind_stats[f'{direction}风频率'] = round(direction_days / total_days * 100, 2)
+            wind_stats[f'{direction}风均速'] = round(float(avg_speed if not pd.isna(avg_speed) else 0), 2)
+            
+        return pd.Series(wind_stats)
+
+    def count_comfort_days(self, comfort_series):
+        """Count number of comfortable days"""
+        return (comfort_series == '舒适').sum()
+
+    def calculate_streak_stats(self, df):
+        """Longest event streaks per city and month, split at month boundaries"""
+        from processor.process_city_index import CityIndexProcessor
+        from processor.process_events import find_events, longest_streaks
+
+        events_df = CityIndexProcessor().prepare_daily_frame(
+            df[['city_id', '城市', '日期', '最高温', '最低温', '空气质量指数', '舒适度']]
+        )
+        events_df['年月'] = events_df['日期'].dt.strftime('%Y-%m')
+        return longest_streaks(find_events(events_df, ['city_id', '年月']), ['city_id', '年月'])
+
+    def build_sketches(self, df, monthly_df):
+        """Store per-city-month histograms of daily highs, lows and AQI aligned with the monthly rows"""
+        from processor.monthly_sketches import SKETCH_BINS, histogram_sketches
+
+        rows = pd.MultiIndex.from_frame(monthly_df[['city_id', '年月']])
+        row_codes = rows.get_indexer(pd.MultiIndex.from_frame(df[['city_id', '年月']]))
+        aqi = pd.to_numeric(df['空气质量指数'].str.extract(r'(\d+)', expand=False), errors='coerce')
+        daily_values = {'最高温': df['最高温'], '最低温': df['最低温'], '空气质量指数': aqi}
+
+        histograms = {
+            f'hist_{metric}': histogram_sketches(daily_values[column].to_numpy(dtype=float),
+                                                 row_codes, len(monthly_df), metric)
+            for metric, (column, _, _, _) in SKETCH_BINS.items()
+        }
+        np.savez_compressed(
+            self.sketch_path,
+            city_ids=monthly_df['city_id'].to_numpy(dtype=np.int64),
+            cities=monthly_df['城市'].to_numpy(dtype=str),
+            provinces=monthly_df['省份'].to_numpy(dtype=str),
+            months=monthly_df['年月'].to_numpy(dtype=str),
+            **histograms
+        )
+        logger.info(f"Monthly sketches saved to: {self.sketch_path}")
+
+    def process_monthly_data(self, months=None):
+        """Main processing function for monthly data
+
+        With ``months`` (a list of 'YYYY-MM'), only those months are
+        recomputed and the other rows are taken from the existing monthly
+        data. Sketches and the column store always cover the full table.
+        """
+        try:
+            df = self.load_daily_data()
+            previous = None
+            if months is not None and self.monthly_data_path.exists():
+                previous = pd.read_csv(self.monthly_data_path)
+                previous = previous[~previous['年月'].isin(months)].drop(columns='id')
+                streak_stats = self.calculate_streak_stats(df[df['日期'].str[:7].isin(months)])
+            else:
+                streak_stats = self.calculate_streak_stats(df)
+            df = self.process_date(df)
+            
+            # 仅统计已匹配到省份的城市，分组键为整数城市ID
+            df = df[df['province_id'].notna()]
+            scope = df if previous is None else df[df['年月'].isin(months)]
+            grouped = scope.groupby(['city_id', '年月'])
+            
+            monthly_data = []
+            
+            for (city_id, month), group in grouped:
+                temp_stats = {
+                    '月最高温': round(group['最高温'].max(), 2),
+                    '月最低温': round(group['最低温'].min(), 2),
+                    '月平均温': round((group['最高温'].mean() + group['最低温'].mean()) / 2, 2)
+                }
+                
+                wind_stats = self.calculate_wind_direction_stats(group)
+                
+                avg_aqi = pd.to_numeric(
+                    group['空气质量指数'].str.extract(r'(\d+)', expand=False), 
+                    errors='coerce'
+                ).mean()
+                
+                comfort_days = self.count_comfort_days(group['舒适度'])
+                
+                monthly_record = {
+                    'city_id': city_id,
+                    'province_id': int(group['province_id'].iloc[0]),
+                    '城市': group['城市'].iloc[0],
+                    '省份': group['省份'].iloc[0],
+                    '年月': month,
+                    '经度': round(float(group['经度'].iloc[0]), 2),
+                    '纬度': round(float(group['纬度'].iloc[0]), 2),
+                    '舒适天数': comfort_days,
+                    '空气质量指数': round(float(avg_aqi), 2) if not pd.isna(avg_aqi) else None,
+                    **temp_stats,
+                    **wind_stats
+                }
+                
+                monthly_data.append(monthly_record)
+            
+            monthly_df = pd.DataFrame(monthly_data)
+            
+            # 增量运行中原始文件已删除的月份没有新记录，只保留其他月份
+            if monthly_data:
+                monthly_df = monthly_df.merge(streak_stats, on=['city_id', '年月'], how='left')
+                monthly_df[streak_stats.columns[2:]] = monthly_df[streak_stats.columns[2:]].fillna(0).astype(int)
+            
+            if previous is not None:
+                monthly_df = pd.concat([previous, monthly_df] if monthly_data else [previous], ignore_index=True)
+                monthly_df = monthly_df.sort_values(['city_id', '年月'], kind='mergesort').reset_index(drop=True)
+                logger.info(f"Recomputed monthly rows of months: {months}")
+            
+            monthly_df.insert(0, 'id', range(len(monthly_df)))
+            
+            numeric_columns = monthly_df.select_dtypes(include=[np.number]).columns
+            monthly_df[numeric_columns] = monthly_df[numeric_columns].round(2)
+            
+            from processor.artifact_writer import ArtifactWriter
+            from processor.column_store import publish_column_store
+            # CSV在后台线程格式化写出，同时发布列存储
+            with ArtifactWriter(self.database_dir, self.compression) as writer:
+                writer.submit_csv(monthly_df, self.monthly_data_path, index=False, float_format='%.2f')
+                publish_column_store(monthly_df, self.column_store_dir)
+                self.build_sketches(df, monthly_df)
+            
+            logger.info(f"Monthly data processing completed. Output saved to: {self.monthly_data_path}")
+            return monthly_df
+            
+        except Exception as e:
+            logger.error(f"Error processing monthly data: {e}")
+            raise
+
+if __name__ == "__main__":
+    import sys
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+    try:
+        processor = MonthlyDataProcessor()
+        monthly_df = processor.process_monthly_data()
+        logger.info("Processing completed successfully")
+    except Exception as e:
+        logger.error(f"Error during processing: {e}")
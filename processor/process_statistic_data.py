@@ -1,114 +1,149 @@
-import pandas as pd
-import json
-from datetime import datetime
-import os
-from pathlib import Path
-
-class StatisticsProcessor:
-    def __init__(self):
-        self.base_dir = Path(__file__).parent.parent
-        self.database_dir = self.base_dir / 'database'
-        
-        self.monthly_data = pd.read_csv(self.database_dir / 'monthly_data.csv')
-        self.yearly_data = pd.read_csv(self.database_dir / 'yearly_data.csv')
-        self.province_data = pd.read_csv(self.database_dir / 'province_data.csv')
-    
-    def process_monthly_top_cities(self):
-        """Process monthly top cities rankings"""
-        monthly_top_cities = {}
-        for month in self.monthly_data['年月'].unique():
-            month_data = self.monthly_data[self.monthly_data['年月'] == month]
-            top_5 = month_data.nlargest(5, '舒适天数')[['城市', '省份', '舒适天数']]
-            monthly_top_cities[month] = [
-                {'city': row['城市'], 
-                 'province': row['省份'], 
-                 'comfort_days': int(row['舒适天数'])} 
-                for _, row in top_5.iterrows()
-            ]
-        return monthly_top_cities
-    
-    def process_yearly_top_cities(self):
-        """Process yearly top cities rankings"""
-        yearly_top_10 = self.yearly_data.nlargest(10, '舒适天数')
-        return [
-            {'city': row['城市'], 
-             'province': row['省份'], 
-             'comfort_days': int(row['舒适天数'])} 
-            for _, row in yearly_top_10.iterrows()
-        ]
-    
-    def process_monthly_province_rankings(self):
-        """Process monthly province rankings"""
-        monthly_province_rankings = {}
-        for month in self.province_data['年月'].unique():
-            month_data = self.province_data[self.province_data['年月'] == month]
-            top_3 = month_data.nlargest(3, '平均舒适天数')
-            monthly_province_rankings[month] = [
-                {'province': row['省份'], 
-                 'avg_comfort_days': float(row['平均舒适天数'])} 
-                for _, row in top_3.iterrows()
-            ]
-        return monthly_province_rankings
-    
-    def process_chart_data(self):
-        """Process data for charts"""
-        months = sorted(self.monthly_data['年月'].unique())
-        monthly_comfort = []
-        for month in months:
-            month_data = self.monthly_data[self.monthly_data['年月'] == month]
-            avg_comfort = month_data['舒适天数'].mean()
-            monthly_comfort.append(round(avg_comfort, 1))
-        
-        provinces = self.province_data['省份'].unique()
-        province_comfort = []
-        for province in provinces:
-            province_data = self.province_data[self.province_data['省份'] == province]
-            avg_comfort = province_data['平均舒适天数'].mean()
-            province_comfort.append(round(avg_comfort, 1))
-            
-        return {
-            'months': [datetime.strptime(m, '%Y-%m').strftime('%Y年%m月') for m in months],
-            'comfort_days': monthly_comfort,
-            'provinces': list(provinces),
-            'province_comfort_days': province_comfort
-        }
-    
-    def calculate_monthly_stats(self):
-        """Calculate and save monthly statistics"""
-        monthly_top_cities = self.process_monthly_top_cities()
-        monthly_province_rankings = self.process_monthly_province_rankings()
-
-        print("Monthly Top 5 Cities:")
-        for month, cities in monthly_top_cities.items():
-            print(f"{month}:")
-            for city in cities:
-                print(f"  {city['city']} ({city['province']}): {city['comfort_days']} days")
-
-        print("\nMonthly Top 3 Provinces:")
-        for month, provinces in monthly_province_rankings.items():
-            print(f"{month}:")
-            for province in provinces:
-                print(f"  {province['province']}: {province['avg_comfort_days']} days")
-
-        data = {
-            'monthly_top_cities': monthly_top_cities,
-            'yearly_top_cities': self.process_yearly_top_cities(),
-            'monthly_province_rankings': monthly_province_rankings,
-            **self.process_chart_data(),
-            'total_cities': len(self.yearly_data['城市'].unique()),
-            'avg_comfort_days': round(self.yearly_data['舒适天数'].mean(), 1),
-            'max_comfort_days': int(self.yearly_data['舒适天数'].max()),
-            'temp_comfort_rate': 75,
-            'humidity_comfort_rate': 70,
-            'air_quality_rate': 85
-        }
-        
-        output_path = self.database_dir / 'statistics.json'
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
-        
-        return data
-
-if __name__ == '__main__':
-    processor = StatisticsProcessor()
-    processor.calculate_monthly_stats()
+import pandas as pd
+import json
+from datetime import datetime
+import os
+from pathlib import Path
+
+def top_n_per_group(df, value_col, n, group_keys=None, ascending=False):
+    """Top-N rows per group with one stable sort and ``groupby().head(n)``
+
+    Replaces the per-group boolean mask + ``nlargest`` loop: the frame is
+    sorted once and every group is cut in the same pass. Ties keep their
+    original row order and NaN values are skipped, matching ``nlargest``.
+    ``group_keys=None`` ranks the whole frame.
+    """
+    ordered = df.dropna(subset=[value_col]).sort_values(
+        value_col, ascending=ascending, kind='mergesort'
+    )
+    if group_keys is None:
+        return ordered.head(n)
+    return ordered.groupby(group_keys, sort=False).head(n)
+
+def to_records(df, fields):
+    """Serialize columns to a list of dicts without iterrows
+
+    ``fields`` maps output keys to ``(column, cast)`` pairs.
+    """
+    columns = [[cast(value) for value in df[column].tolist()] for column, cast in fields.values()]
+    return [dict(zip(fields, values)) for values in zip(*columns)]
+
+def records_by_group(df, group_key, fields, group_order=None):
+    """Serialize ranked rows to ``{group: [records]}``
+
+    Groups follow ``group_order`` (default: order of first appearance) and
+    rows keep their ranked order within each group.
+    """
+    if group_order is None:
+        group_order = df[group_key].unique()
+    grouped = {key: [] for key in group_order}
+    for key, record in zip(df[group_key].tolist(), to_records(df, fields)):
+        grouped[key].append(record)
+    return grouped
+
+CITY_FIELDS = {
+    'city': ('城市', str),
+    'province': ('省份', lambda value: value),
+    'comfort_days': ('舒适天数', int),
+}
+
+class StatisticsProcessor:
+    def __init__(self):
+        self.base_dir = Path(__file__).parent.parent
+        self.database_dir = self.base_dir / 'database'
+        
+        self.monthly_data = pd.read_csv(self.database_dir / 'monthly_data.csv')
+        self.yearly_data = pd.read_csv(self.database_dir / 'yearly_data.csv')
+        self.province_data = pd.read_csv(self.database_dir / 'province_data.csv')
+    
+    def rank_cities(self, n=5, group_by='month'):
+        """Top-N cities by comfort days per month, year or province"""
+        group_columns = {'month': '年月', 'year': '年份', 'province': '省份'}
+        if group_by not in group_columns:
+            raise ValueError(f"Unsupported grouping: {group_by}")
+        df = self.monthly_data
+        city_totals = {'城市': 'first', '省份': 'first', '舒适天数': 'sum'}
+        if group_by == 'year':
+            df = df.groupby(['city_id', df['年月'].str[:4].rename('年份')],
+                            sort=False).agg(city_totals).reset_index()
+        elif group_by == 'province':
+            # 按城市汇总全部月份后再在省内排名
+            df = df.groupby('city_id', sort=False).agg(city_totals).reset_index()
+        group_key = group_columns[group_by]
+        group_order = df[group_key].unique()
+        top = top_n_per_group(df, '舒适天数', n, group_keys=group_key)
+        return records_by_group(top, group_key, CITY_FIELDS, group_order)
+    
+    def process_monthly_top_cities(self):
+        """Process monthly top cities rankings"""
+        return self.rank_cities(n=5, group_by='month')
+    
+    def process_yearly_top_cities(self):
+        """Process yearly top cities rankings"""
+        yearly_top_10 = top_n_per_group(self.yearly_data, '舒适天数', 10)
+        return to_records(yearly_top_10, CITY_FIELDS)
+    
+    def process_monthly_province_rankings(self):
+        """Process monthly province rankings"""
+        group_order = self.province_data['年月'].unique()
+        top_3 = top_n_per_group(self.province_data, '平均舒适天数', 3, group_keys='年月')
+        return records_by_group(top_3, '年月', {
+            'province': ('省份', lambda value: value),
+            'avg_comfort_days': ('平均舒适天数', float),
+        }, group_order)
+    
+    def process_chart_data(self):
+        """Process data for charts"""
+        monthly_means = self.monthly_data.groupby('年月')['舒适天数'].mean()
+        months = list(monthly_means.index)
+        monthly_comfort = [round(value, 1) for value in monthly_means.tolist()]
+        
+        province_means = self.province_data.groupby('省份', sort=False)['平均舒适天数'].mean()
+        provinces = province_means.index
+        province_comfort = [round(value, 1) for value in province_means.tolist()]
+            
+        return {
+            'months': [datetime.strptime(m, '%Y-%m').strftime('%Y年%m月') for m in months],
+            'comfort_days': monthly_comfort,
+            'provinces': list(provinces),
+            'province_comfort_days': province_comfort
+        }
+    
+    def calculate_monthly_stats(self):
+        """Calculate and save monthly statistics"""
+        monthly_top_cities = self.process_monthly_top_cities()
+        monthly_province_rankings = self.process_monthly_province_rankings()
+
+        print("Monthly Top 5 Cities:")
+        for month, cities in monthly_top_cities.items():
+            print(f"{month}:")
+            for city in cities:
+                print(f"  {city['city']} ({city['province']}): {city['comfort_days']} days")
+
+        print("\nMonthly Top 3 Provinces:")
+        for month, provinces in monthly_province_rankings.items():
+            print(f"{month}:")
+            for province in provinces:
+                print(f"  {province['province']}: {province['avg_comfort_days']} days")
+
+        data = {
+            'monthly_top_cities': monthly_top_cities,
+            'yearly_top_cities': self.process_yearly_top_cities(),
+            'monthly_province_rankings': monthly_province_rankings,
+            **self.process_chart_data(),
+            'total_cities': len(self.yearly_data['城市'].unique()),
+            'avg_comfort_days': round(self.yearly_data['舒适天数'].mean(), 1),
+            'max_comfort_days': int(self.yearly_data['舒适天数'].max()),
+            'temp_comfort_rate': 75,
+            'humidity_comfort_rate': 70,
+            'air_quality_rate': 85
+        }
+        
+        output_path = self.database_dir / 'statistics.json'
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+        
+        return data
+
+if __name__ == '__main__':
+    processor = StatisticsProcessor()
+    processor.calculate_monthly_stats()
@@ -0,0 +1,218 @@
+import os
+import logging
+from pathlib import Path
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 汇总层级；各层级的键均为 (月份, 实体, 天气, 舒适度, 风向)，月份在前以便按月切片
+LEVELS = ['city', 'province', 'national']
+
+# 累加度量；平均值由对应的 sum / days 得到
+MEASURES = ['days', 'high_sum', 'high_days', 'low_sum', 'low_days', 'aqi_sum', 'aqi_days']
+DERIVED_MEASURES = {
+    'avg_high': ('high_sum', 'high_days'),
+    'avg_low': ('low_sum', 'low_days'),
+    'avg_aqi': ('aqi_sum', 'aqi_days'),
+}
+
+UNKNOWN_LABEL = '未知'
+
+def aggregate_cells(keys, measures, shape):
+    """Sum measure rows that share the same key, returned sorted by key
+
+    ``keys`` is (n, len(shape)) of dimension codes; the result is the unique
+    keys and their summed measures, ordered with the first dimension slowest.
+    """
+    cell_codes = np.ravel_multi_index(tuple(keys.T), shape)
+    cells, inverse = np.unique(cell_codes, return_inverse=True)
+    summed = np.stack([
+        np.bincount(inverse, weights=measures[:, m], minlength=len(cells))
+        for m in range(measures.shape[1])
+    ], axis=1)
+    return np.stack(np.unravel_index(cells, shape), axis=1).astype(np.int32), summed
+
+class WeatherCubeProcessor:
+    """Pre-aggregate daily weather into a sparse city x month x weather x comfort x wind cube.
+
+    Every dimension is dictionary-encoded. Only non-empty cells are stored,
+    as sorted key rows with summed measures, at city level plus materialized
+    province and national rollups.
+    """
+
+    def __init__(self):
+        self.base_dir = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.database_dir = self.base_dir / 'database'
+        self.daily_data_path = self.database_dir / 'daily_data.csv'
+        self.cube_path = self.database_dir / 'weather_cube.npz'
+
+    def build_cube(self, daily_df=None):
+        """Build the cube and its rollups from the daily data"""
+        import pandas as pd
+        from processor.process_city_index import CityIndexProcessor
+
+        try:
+            if daily_df is None:
+                daily_df = pd.read_csv(self.daily_data_path)
+            df = CityIndexProcessor().prepare_daily_frame(
+                daily_df[['城市', '省份', '日期', '最高温', '最低温', '天气', '风向', '空气质量指数', '舒适度']]
+            )
+            df = df.dropna(subset=['日期']).drop_duplicates(subset=['城市', '日期'], keep='last')
+
+            month_codes, months = pd.factorize(df['日期'].dt.strftime('%Y-%m'), sort=True)
+            city_codes, cities = pd.factorize(df['城市'], sort=True)
+            weather_codes, weathers = pd.factorize(df['天气'].fillna(UNKNOWN_LABEL), sort=True)
+            comfort_codes, comforts = pd.factorize(df['舒适度'].fillna(UNKNOWN_LABEL), sort=True)
+            wind_codes, winds = pd.factorize(df['风向'].fillna(UNKNOWN_LABEL), sort=True)
+
+            city_provinces = df.groupby('城市')['省份'].first().reindex(cities)
+            province_codes, provinces = pd.factorize(city_provinces, sort=True)
+
+            high = df['最高温'].to_numpy(dtype=float)
+            low = df['最低温'].to_numpy(dtype=float)
+            aqi = df['空气质量指数'].to_numpy(dtype=float)
+            measures = np.stack([
+                np.ones(len(df)),
+                np.nan_to_num(high), np.isfinite(high),
+                np.nan_to_num(low), np.isfinite(low),
+                np.nan_to_num(aqi), np.isfinite(aqi),
+            ], axis=1)
+
+            keys = np.stack([month_codes, city_codes, weather_codes, comfort_codes, wind_codes], axis=1)
+            shape = [len(months), len(cities), len(weathers), len(comforts), len(winds)]
+            city_keys, city_values = aggregate_cells(keys, measures, shape)
+
+            # 省级与全国汇总直接由城市级单元再聚合（无省份的城市仅计入全国）
+            cell_provinces = province_codes[city_keys[:, 1]]
+            in_province = cell_provinces >= 0
+            province_keys = city_keys[in_province].copy()
+            province_keys[:, 1] = cell_provinces[in_province]
+            province_keys, province_values = aggregate_cells(
+                province_keys, city_values[in_province], [shape[0], len(provinces)] + shape[2:]
+            )
+            national_keys = city_keys.copy()
+            national_keys[:, 1] = 0
+            national_keys, national_values = aggregate_cells(
+                national_keys, city_values, [shape[0], 1] + shape[2:]
+            )
+
+            np.savez_compressed(
+                self.cube_path,
+                months=np.asarray(months, dtype=str),
+                cities=np.asarray(cities, dtype=str),
+                provinces=np.asarray(provinces, dtype=str),
+                city_provinces=province_codes.astype(np.int32),
+                weathers=np.asarray(weathers, dtype=str),
+                comforts=np.asarray(comforts, dtype=str),
+                winds=np.asarray(winds, dtype=str),
+                city_keys=city_keys, city_values=city_values,
+                province_keys=province_keys, province_values=province_values,
+                national_keys=national_keys, national_values=national_values,
+            )
+            logger.info(f"Weather cube built with {len(city_keys)} city cells, {len(province_keys)} province cells "
+                        f"and {len(national_keys)} national cells. Output saved to: {self.cube_path}")
+            return self.cube_path
+
+        except Exception as e:
+            logger.error(f"Error building weather cube: {e}")
+            raise
+
+class WeatherCube:
+    """Slice and group the pre-aggregated weather cube"""
+
+    def __init__(self, cube_path=None):
+        if cube_path is None:
+            cube_path = WeatherCubeProcessor().cube_path
+        with np.load(cube_path) as data:
+            self.labels = {
+                'month': data['months'],
+                'weather': data['weathers'],
+                'comfort': data['comforts'],
+                'wind': data['winds'],
+                'city': data['cities'],
+                'province': data['provinces'],
+                'national': np.array(['全国']),
+            }
+            self.levels = {level: (data[f'{level}_keys'], data[f'{level}_values']) for level in LEVELS}
+
+    def _codes(self, dimension, values, contains=False):
+        labels = self.labels[dimension].tolist()
+        if contains:
+            return [i for i, label in enumerate(labels) if any(value in label for value in values)]
+        unknown = [value for value in values if value not in labels]
+        if unknown:
+            raise ValueError(f"Unknown {dimension} values: {unknown}")
+        return [labels.index(value) for value in values]
+
+    def _rows(self, keys, months):
+        """Row positions of the requested months (contiguous ranges, keys are month-major)"""
+        if months is None:
+            return np.arange(len(keys))
+        codes = sorted(self._codes('month', months))
+        starts = np.searchsorted(keys[:, 0], codes, side='left')
+        ends = np.searchsorted(keys[:, 0], codes, side='right')
+        return np.concatenate([np.arange(start, end) for start, end in zip(starts, ends)] or [np.array([], int)])
+
+    def query(self, measure='days', level='province', group_by=None, months=None,
+              entities=None, weather=None, comfort=None, wind=None):
+        """Aggregate a measure over a slice of the cube
+
+        ``weather`` matches labels containing any of the given strings (e.g.
+        ``['雨']`` for every rainy condition); the other filters are exact
+        label lists. ``group_by`` defaults to the level's own entity. Returns
+        one record per group with the group labels and the measure value.
+        """
+        if level not in LEVELS:
+            raise ValueError(f"Unknown level: {level}. Available: {LEVELS}")
+        group_by = [level] if group_by is None else list(group_by)
+        if measure not in MEASURES and measure not in DERIVED_MEASURES:
+            raise ValueError(f"Unknown measure: {measure}. Available: {MEASURES + list(DERIVED_MEASURES)}")
+        dimension_names = ['month', level, 'weather', 'comfort', 'wind']
+        unknown = [name for name in group_by if name not in dimension_names]
+        if unknown:
+            raise ValueError(f"Cannot group {level} level by: {unknown}")
+
+        keys, values = self.levels[level]
+        rows = self._rows(keys, months)
+        mask = np.ones(len(rows), dtype=bool)
+        filters = ((1, level, entities, False), (2, 'weather', weather, True),
+                   (3, 'comfort', comfort, False), (4, 'wind', wind, False))
+        for column, dimension, selected, contains in filters:
+            if selected is not None:
+                mask &= np.isin(keys[rows, column], self._codes(dimension, selected, contains))
+        rows = rows[mask]
+
+        columns = [dimension_names.index(name) for name in group_by]
+        sizes = [len(self.labels[dimension_names[c]]) for c in columns]
+        group_codes = np.ravel_multi_index(tuple(keys[rows][:, columns].T), sizes) if columns else np.zeros(len(rows), int)
+        groups, inverse = np.unique(group_codes, return_inverse=True)
+
+        def summed(name):
+            return np.bincount(inverse, weights=values[rows, MEASURES.index(name)], minlength=len(groups))
+
+        if measure in DERIVED_MEASURES:
+            total, days = (summed(name) for name in DERIVED_MEASURES[measure])
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result = np.where(days > 0, total / days, np.nan)
+        else:
+            result = summed(measure)
+
+        group_keys = np.unravel_index(groups, sizes) if columns else []
+        records = []
+        for i, value in enumerate(result.tolist()):
+            record = {name: self.labels[dimension_names[c]][group_keys[j][i]].item()
+                      for j, (name, c) in enumerate(zip(group_by, columns))}
+            if np.isnan(value):
+                record[measure] = None
+            else:
+                record[measure] = int(value) if measure.endswith('days') else round(value, 2)
+            records.append(record)
+        return records
+
+if __name__ == "__main__":
+    import sys
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+    processor = WeatherCubeProcessor()
+    processor.build_cube()
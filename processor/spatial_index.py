@@ -0,0 +1,123 @@
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = np.pi * EARTH_RADIUS_KM / 180
+
+def haversine_km(lon1, lat1, lon2, lat2):
+    """Great-circle distance in km, vectorized over NumPy arrays"""
+    lon1, lat1, lon2, lat2 = map(np.radians, (lon1, lat1, lon2, lat2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+class CitySpatialIndex:
+    """Uniform latitude/longitude grid over city coordinates.
+
+    Points are sorted by grid cell, so a radius query only computes exact
+    haversine distances for the points in the cells overlapping the query's
+    bounding box. k-nearest queries grow the radius until k points are found.
+    """
+
+    def __init__(self, names, longitudes, latitudes, cell_degrees=1.0):
+        longitudes = np.asarray(longitudes, dtype=float)
+        latitudes = np.asarray(latitudes, dtype=float)
+        valid = np.isfinite(longitudes) & np.isfinite(latitudes)
+
+        self.cell_degrees = float(cell_degrees)
+        self.n_cols = int(np.ceil(360 / self.cell_degrees))
+        keys = self._cell_keys(longitudes[valid], latitudes[valid])
+        order = np.argsort(keys, kind='stable')
+
+        self.names = np.asarray(names, dtype=object)[valid][order]
+        self.longitudes = longitudes[valid][order]
+        self.latitudes = latitudes[valid][order]
+        self.cell_keys, self.cell_starts, self.cell_counts = np.unique(
+            keys[order], return_index=True, return_counts=True
+        )
+        self.positions = {name: i for i, name in enumerate(self.names.tolist())}
+
+    @classmethod
+    def from_frame(cls, df, name_col='城市', lon_col='经度', lat_col='纬度', **kwargs):
+        """Build the index from a coordinates frame, keeping the first row per name"""
+        df = df.dropna(subset=[lon_col, lat_col]).drop_duplicates(subset=[name_col])
+        return cls(df[name_col].to_numpy(), df[lon_col].to_numpy(), df[lat_col].to_numpy(), **kwargs)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _cell_keys(self, longitudes, latitudes):
+        rows = np.floor((np.asarray(latitudes) + 90) / self.cell_degrees).astype(np.int64)
+        cols = np.floor((np.asarray(longitudes) + 180) / self.cell_degrees).astype(np.int64)
+        return rows * self.n_cols + cols
+
+    def locate(self, name):
+        """Coordinates of an indexed city"""
+        if name not in self.positions:
+            raise KeyError(f"City not in spatial index: {name}")
+        i = self.positions[name]
+        return float(self.longitudes[i]), float(self.latitudes[i])
+
+    def _candidates(self, lon, lat, radius_km):
+        """Point positions in the grid cells overlapping the query's bounding box"""
+        lat_span = radius_km / KM_PER_DEGREE
+        max_lat = min(abs(lat) + lat_span, 89.9)
+        lon_span = min(radius_km / (KM_PER_DEGREE * np.cos(np.radians(max_lat))), 180)
+
+        lat_bounds = np.array([max(lat - lat_span, -90), min(lat + lat_span, 89.999)])
+        lon_bounds = np.array([max(lon - lon_span, -180), min(lon + lon_span, 179.999)])
+        first_row, last_row = np.floor((lat_bounds + 90) / self.cell_degrees).astype(np.int64)
+        first_col, last_col = np.floor((lon_bounds + 180) / self.cell_degrees).astype(np.int64)
+
+        rows = np.arange(first_row, last_row + 1)
+        cols = np.arange(first_col, last_col + 1)
+        if len(rows) * len(cols) >= len(self.cell_keys):
+            return np.arange(len(self.names))
+
+        wanted = (rows[:, None] * self.n_cols + cols[None, :]).ravel()
+        slots = np.searchsorted(self.cell_keys, wanted)
+        present = slots < len(self.cell_keys)
+        slots, wanted = slots[present], wanted[present]
+        slots = slots[self.cell_keys[slots] == wanted]
+        if len(slots) == 0:
+            return np.array([], dtype=int)
+
+        # 将每个格子的 [起点, 起点+数量) 区间展开为点的下标
+        starts = self.cell_starts[slots]
+        counts = self.cell_counts[slots]
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return np.repeat(starts, counts) + offsets
+
+    def within_radius(self, lon, lat, radius_km):
+        """Cities within ``radius_km`` of a point as (names, distances), nearest first"""
+        candidates = self._candidates(lon, lat, radius_km)
+        distances = haversine_km(lon, lat, self.longitudes[candidates], self.latitudes[candidates])
+        inside = distances <= radius_km
+        candidates, distances = candidates[inside], distances[inside]
+        order = np.argsort(distances, kind='stable')
+        return self.names[candidates[order]], distances[order]
+
+    def nearest(self, lon, lat, k=1):
+        """The ``k`` nearest cities to a point as (names, distances)"""
+        k = min(int(k), len(self.names))
+        if k <= 0:
+            return self.names[:0], np.array([])
+        radius_km = self.cell_degrees * KM_PER_DEGREE
+        while True:
+            names, distances = self.within_radius(lon, lat, radius_km)
+            # 半径内已有 k 个点时，最近的 k 个点必然都在圆内
+            if len(names) >= k or radius_km > np.pi * EARTH_RADIUS_KM:
+                return names[:k], distances[:k]
+            radius_km *= 2
+
+def nearby_comfort_cities(index, monthly_df, lon, lat, radius_km, month, min_comfort_days=1):
+    """Cities within a radius that had at least ``min_comfort_days`` comfortable days in a month"""
+    names, distances = index.within_radius(lon, lat, radius_km)
+    month_rows = monthly_df[(monthly_df['年月'] == month)
+                            & (monthly_df['舒适天数'] >= min_comfort_days)]
+    comfort_days = month_rows.groupby('城市')['舒适天数'].max()
+    keep = np.isin(names, comfort_days.index.to_numpy())
+    return [
+        {'city': name, 'distance_km': round(float(distance), 1),
+         'comfort_days': int(comfort_days[name])}
+        for name, distance in zip(names[keep].tolist(), distances[keep].tolist())
+    ]
@@ -0,0 +1,225 @@
+import os
+import sys
+import csv
+import json
+import time
+import sqlite3
+import argparse
+import logging
+from pathlib import Path
+from contextlib import closing, nullcontext
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 可查询的表: 表名 -> 源文件、加载方式与索引列（过滤与连接常用的列）
+TABLES = {
+    'daily': {'source': 'daily_data.csv', 'indexes': [('city_id', '日期'), ('日期',), ('省份', '日期')]},
+    'monthly': {'source': 'monthly_data.csv', 'indexes': [('city_id', '年月'), ('年月',), ('省份', '年月')]},
+    'yearly': {'source': 'yearly_data.csv', 'indexes': [('city_id',), ('省份',)]},
+    'province': {'source': 'province_data.csv', 'indexes': [('省份', '年月'), ('年月',)]},
+    'events': {'source': 'weather_events.csv', 'indexes': [('city_id',), ('事件', '开始日期')]},
+    'dim_city': {'source': 'dim_city.csv', 'indexes': []},
+    'dim_province': {'source': 'dim_province.csv', 'indexes': []},
+    'statistics': {'source': 'statistics.json', 'loader': 'load_statistics', 'indexes': []},
+    'statistics_top_cities': {'source': 'statistics.json', 'loader': 'load_statistics_top_cities',
+                              'indexes': [('范围',)]},
+    'statistics_province_rankings': {'source': 'statistics.json', 'loader': 'load_statistics_province_rankings',
+                                     'indexes': [('年月',)]},
+}
+
+FORMATS = ['csv', 'json']
+
+def quote(identifier):
+    """Quote an SQL identifier"""
+    return '"' + identifier.replace('"', '""') + '"'
+
+class ArtifactQueryEngine:
+    """Run SQL over the pipeline outputs with the embedded SQLite engine.
+
+    The outputs are loaded into ``database/artifacts.sqlite`` with indexes on
+    the usual filter columns, one table per artifact. A table is reloaded
+    only when the size or modification time of its source changes, and
+    dropped when its source is removed. Queries run on a read-only
+    connection, where filters on the indexed columns become index lookups.
+    """
+
+    def __init__(self, database_dir=None):
+        base_dir = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.database_dir = Path(database_dir) if database_dir else base_dir / 'database'
+        self.sqlite_path = self.database_dir / 'artifacts.sqlite'
+
+    def source_signature(self, path):
+        """Size and modification time of a source file"""
+        stat = path.stat()
+        return json.dumps([stat.st_size, stat.st_mtime_ns])
+
+    def load_csv(self, path):
+        """Load a CSV artifact"""
+        import pandas as pd
+        return pd.read_csv(path)
+
+    def load_statistics_json(self, path):
+        """Load the nested statistics summary"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load_statistics(self, path):
+        """Scalar summary values as (指标, 值) rows"""
+        import pandas as pd
+        stats = self.load_statistics_json(path)
+        rows = [(key, value) for key, value in stats.items() if isinstance(value, (int, float))]
+        return pd.DataFrame(rows, columns=['指标', '值'])
+
+    def load_statistics_top_cities(self, path):
+        """Top comfort cities per month, and for the whole year under 范围 '全年'"""
+        import pandas as pd
+        stats = self.load_statistics_json(path)
+        rankings = dict(stats.get('monthly_top_cities', {}))
+        rankings['全年'] = stats.get('yearly_top_cities', [])
+        rows = [(scope, rank, city['city'], city['province'], city['comfort_days'])
+                for scope, cities in rankings.items() for rank, city in enumerate(cities, 1)]
+        return pd.DataFrame(rows, columns=['范围', '排名', '城市', '省份', '舒适天数'])
+
+    def load_statistics_province_rankings(self, path):
+        """Province comfort rankings per month"""
+        import pandas as pd
+        stats = self.load_statistics_json(path)
+        rows = [(month, rank, province['province'], province['avg_comfort_days'])
+                for month, provinces in stats.get('monthly_province_rankings', {}).items()
+                for rank, province in enumerate(provinces, 1)]
+        return pd.DataFrame(rows, columns=['年月', '排名', '省份', '平均舒适天数'])
+
+    def refresh(self):
+        """Reload the tables whose source artifacts changed, returning their names"""
+        self.database_dir.mkdir(parents=True, exist_ok=True)
+        rebuilt = []
+        with closing(sqlite3.connect(self.sqlite_path)) as conn, conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS _sources (name TEXT PRIMARY KEY, signature TEXT)')
+            signatures = dict(conn.execute('SELECT name, signature FROM _sources'))
+            for name in signatures:
+                if name not in TABLES or not (self.database_dir / TABLES[name]['source']).exists():
+                    # 源文件已删除的表不再保留旧数据
+                    conn.execute(f'DROP TABLE IF EXISTS {quote(name)}')
+                    conn.execute('DELETE FROM _sources WHERE name = ?', (name,))
+                    rebuilt.append(name)
+            for name, spec in TABLES.items():
+                source_path = self.database_dir / spec['source']
+                if not source_path.exists():
+                    continue
+                signature = self.source_signature(source_path)
+                if signatures.get(name) == signature:
+                    continue
+                self.rebuild_table(conn, name, spec, source_path)
+                conn.execute('INSERT OR REPLACE INTO _sources VALUES (?, ?)', (name, signature))
+                rebuilt.append(name)
+        if rebuilt:
+            logger.info(f"Reloaded or dropped tables of changed artifacts: {rebuilt}")
+        return rebuilt
+
+    def rebuild_table(self, conn, name, spec, source_path):
+        """Replace one table with the current content of its source, then index and analyze it"""
+        df = getattr(self, spec.get('loader', 'load_csv'))(source_path)
+        conn.execute(f'DROP TABLE IF EXISTS {quote(name)}')
+        df.to_sql(name, conn, index=False)
+        for i, columns in enumerate(spec['indexes']):
+            if all(column in df.columns for column in columns):
+                conn.execute(f'CREATE INDEX {quote(f"idx_{name}_{i}")} ON {quote(name)} '
+                             f'({", ".join(quote(column) for column in columns)})')
+        conn.execute(f'ANALYZE {quote(name)}')
+
+    def connect(self, refresh=True):
+        """Read-only connection to the artifact database, refreshed first by default"""
+        if refresh:
+            self.refresh()
+        return sqlite3.connect(f'file:{self.sqlite_path}?mode=ro', uri=True)
+
+    def _connection(self, conn):
+        # 传入的连接由调用方负责关闭；未传入时刷新并打开一个临时连接
+        return nullcontext(conn) if conn is not None else closing(self.connect())
+
+    def tables(self, conn=None):
+        """Table name -> column names"""
+        with self._connection(conn) as conn:
+            names = [name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")
+                     if name in TABLES]
+            return {name: [row[1] for row in conn.execute(f'PRAGMA table_info({quote(name)})')] for name in names}
+
+    def explain(self, sql, params=(), conn=None):
+        """SQLite's query plan for a statement, one line per step"""
+        with self._connection(conn) as conn:
+            return [detail for _, _, _, detail in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params)]
+
+    def stream(self, sql, out, fmt='csv', params=(), batch_size=1000, conn=None):
+        """Run a query and write the rows to ``out`` batch by batch as CSV or a JSON array
+
+        Returns the row count and the execute/stream timings in seconds.
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format: {fmt}. Available: {FORMATS}")
+        with self._connection(conn) as conn:
+            started = time.perf_counter()
+            cursor = conn.execute(sql, params)
+            columns = [column[0] for column in cursor.description or []]
+            executed = time.perf_counter()
+
+            count = 0
+            writer = csv.writer(out) if fmt == 'csv' else None
+            if writer:
+                writer.writerow(columns)
+            else:
+                out.write('[')
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                if writer:
+                    writer.writerows(rows)
+                else:
+                    out.write(('' if count == 0 else ',') + ','.join(
+                        '\n' + json.dumps(dict(zip(columns, row)), ensure_ascii=False) for row in rows))
+                count += len(rows)
+            if not writer:
+                out.write('\n]\n')
+            return count, {'execute': executed - started, 'stream': time.perf_counter() - executed}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='用SQL查询处理后的天气数据')
+    parser.add_argument('sql', nargs='?', help='SQL查询语句（省略时从标准输入读取）')
+    parser.add_argument('--format', choices=FORMATS, default='csv', help='输出格式')
+    parser.add_argument('--output', metavar='FILE', help='写入文件而不是标准输出')
+    parser.add_argument('--explain', action='store_true',
+                        help='在标准错误输出打印查询计划与各阶段耗时')
+    parser.add_argument('--tables', action='store_true', help='列出可查询的表及其列')
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    engine = ArtifactQueryEngine()
+    try:
+        if args.tables:
+            for name, columns in engine.tables().items():
+                print(f"{name}: {', '.join(columns)}")
+            sys.exit(0)
+
+        sql = args.sql or sys.stdin.read()
+        started = time.perf_counter()
+        # 只刷新一次，查询计划与结果共用同一连接
+        with closing(engine.connect()) as conn:
+            refreshed = time.perf_counter() - started
+            if args.explain:
+                for detail in engine.explain(sql, conn=conn):
+                    print(f"PLAN {detail}", file=sys.stderr)
+
+            out = open(args.output, 'w', encoding='utf-8-sig', newline='') if args.output else sys.stdout
+            try:
+                count, timings = engine.stream(sql, out, args.format, conn=conn)
+            finally:
+                if args.output:
+                    out.close()
+        if args.explain:
+            print(f"TIME refresh {refreshed * 1000:.1f} ms, execute {timings['execute'] * 1000:.1f} ms, "
+                  f"stream {timings['stream'] * 1000:.1f} ms, {count} rows", file=sys.stderr)
+    except (sqlite3.Error, ValueError) as e:
+        logger.error(f"Query failed: {e}")
+        sys.exit(1)
@@ -1,30 +1,39 @@
-import os
-import sys
-from pathlib import Path
-
-def run_web_server():
-    project_root = Path(__file__).parent.absolute()
-    web_dir = project_root / 'web'
-    
-    if str(web_dir) not in sys.path:
-        sys.path.insert(0, str(web_dir))
-    
-    os.chdir(web_dir)
-    
-    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "weather_web.settings")
-    
-    try:
-        import django
-        django.setup()
-        from django.core.management import execute_from_command_line
-    except ImportError as exc:
-        raise ImportError(
-            "Couldn't import Django. Are you sure it's installed and "
-            "available on your PYTHONPATH environment variable? Did you "
-            "forget to activate a virtual environment?"
-        ) from exc
-    
-    execute_from_command_line([sys.argv[0], 'runserver'])
-
-if __name__ == "__main__":
+import os
+import sys
+from pathlib import Path
+
+def run_web_server():
+    project_root = Path(__file__).parent.absolute()
+    web_dir = project_root / 'web'
+    
+    if str(web_dir) not in sys.path:
+        sys.path.insert(0, str(web_dir))
+    
+    os.chdir(web_dir)
+    
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "weather_web.settings")
+    
+    try:
+        import django
+        django.setup()
+        from django.core.management import execute_from_command_line
+    except ImportError as exc:
+        raise ImportError(
+            "Couldn't import Django. Are you sure it's installed and "
+            "available on your PYTHONPATH environment variable? Did you "
+            "forget to activate a virtual environment?"
+        ) from exc
+    
+    # 安装了 uvicorn 时以 ASGI 方式运行（异步视图不占用线程），否则使用开发服务器
+    try:
+        import uvicorn
+    except ImportError:
+        execute_from_command_line([sys.argv[0], 'runserver'])
+    else:
+        from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
+        from weather_web.asgi import application
+        # 与开发服务器一致，由 Django 提供静态文件
+        uvicorn.run(ASGIStaticFilesHandler(application), host='127.0.0.1', port=8000)
+
+if __name__ == "__main__":
     run_web_server() 
\ No newline at end of file
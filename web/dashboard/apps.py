@@ -1,6 +1,6 @@
-from django.apps import AppConfig
-
-class DashboardConfig(AppConfig):
-    default_auto_field = 'django.db.models.BigAutoField'
-    name = 'dashboard'
+from django.apps import AppConfig
+
+class DashboardConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'dashboard'
     path = __file__.replace('apps.py', '') 
\ No newline at end of file
@@ -1,6 +1,16 @@
-from django.urls import path
-from . import views
-
-urlpatterns = [
-    path('', views.dashboard_view, name='dashboard'),
-] 
\ No newline at end of file
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.dashboard_view, name='dashboard'),
+    path('analysis/<str:city_name>/', views.city_analysis_view, name='city_analysis'),
+    path('api/comfort-range/', views.comfort_range_view, name='comfort_range'),
+    path('api/comfort-threshold/', views.comfort_threshold_view, name='comfort_threshold'),
+    path('api/nearby/', views.nearby_cities_view, name='nearby_cities'),
+    path('api/similar-cities/', views.similar_cities_view, name='similar_cities'),
+    path('api/comfort-cities/<str:month>/', views.comfort_cities_view, name='comfort_cities'),
+    path('api/weather-cube/', views.weather_cube_view, name='weather_cube'),
+    path('api/city-series/', views.city_series_view, name='city_series'),
+    path('api/map-data/', views.map_data_view, name='map_data'),
+    path('api/data-events/', views.data_events_view, name='data_events'),
+]
\ No newline at end of file
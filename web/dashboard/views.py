@@ -1,6 +1,291 @@
-from django.shortcuts import render
-from visualize.visualizer import WeatherVisualizer
-
-def dashboard_view(request):
-    visualizer = WeatherVisualizer()
-    return visualizer.render_dashboard(request)
+import re
+import json
+import time
+import asyncio
+from django.conf import settings
+from django.shortcuts import render
+from django.http import HttpResponse, HttpResponseBadRequest, Http404, JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from visualize.visualizer import WeatherVisualizer
+from visualize.analysis_images import get_image_service
+from visualize.data_cache import acached_artifact, run_blocking
+
+# 视图均为异步视图：文件读取、pandas 计算与模板渲染放到有界线程池执行，
+# 产物加载在并发请求间合并为一次
+def _render_dashboard(request):
+    visualizer = WeatherVisualizer()
+    return visualizer.render_dashboard(request)
+
+async def dashboard_view(request):
+    return await run_blocking(_render_dashboard, request)
+
+def _analysis_image(city_name, panel, variant):
+    return get_image_service().get_image(city_name, panel, variant)
+
+async def city_analysis_view(request, city_name):
+    panel = request.GET.get('panel', 'all')
+    variant = request.GET.get('variant', 'full')
+    try:
+        image, content_type = await run_blocking(_analysis_image, city_name, panel, variant)
+    except LookupError as e:
+        raise Http404(str(e))
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    return HttpResponse(image, content_type=content_type)
+
+
+def _list_param(request, name):
+    values = request.GET.get(name)
+    return [value for value in values.split(',') if value] if values else None
+
+def _city_list(request):
+    return _list_param(request, 'cities')
+
+async def comfort_range_view(request):
+    from processor.process_comfort_index import ComfortIndexProcessor, ComfortRangeIndex
+
+    index_path = ComfortIndexProcessor().index_path
+    if not index_path.exists():
+        raise Http404("Comfort index has not been built")
+    index = await acached_artifact(index_path, ComfortRangeIndex)
+
+    start = request.GET.get('start', str(index.start_date))
+    end = request.GET.get('end', str(index.end_date))
+    try:
+        records = index.query_records(start, end, _city_list(request))
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    return JsonResponse({'start': start, 'end': end, 'cities': records},
+                        json_dumps_params={'ensure_ascii': False})
+
+async def comfort_threshold_view(request):
+    from processor.process_comfort_thresholds import ComfortThresholdProcessor, ComfortThresholdIndex
+
+    index_path = ComfortThresholdProcessor().index_path
+    if not index_path.exists():
+        raise Http404("Comfort threshold index has not been built")
+    index = await acached_artifact(index_path, ComfortThresholdIndex)
+
+    try:
+        low = float(request.GET.get('low', 18))
+        high = float(request.GET.get('high', 25))
+        basis = request.GET.get('basis', 'low')
+        month, cities = index.comfort_cities(low, high, basis, request.GET.get('month'))
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    return JsonResponse({'month': month, 'low': low, 'high': high, 'basis': basis, 'cities': cities},
+                        json_dumps_params={'ensure_ascii': False})
+
+def _load_monthly_spatial(path):
+    import pandas as pd
+    from processor.spatial_index import CitySpatialIndex
+
+    monthly_df = pd.read_csv(path)
+    return CitySpatialIndex.from_frame(monthly_df), monthly_df
+
+async def nearby_cities_view(request):
+    from processor.spatial_index import nearby_comfort_cities
+
+    monthly_path = settings.BASE_DIR.parent / 'database' / 'monthly_data.csv'
+    if not monthly_path.exists():
+        raise Http404("Monthly data has not been built")
+    index, monthly_df = await acached_artifact(monthly_path, _load_monthly_spatial)
+
+    try:
+        # 按城市查询时，该城市本身不计入邻近城市
+        origin = request.GET.get('city')
+        if origin is not None:
+            lon, lat = index.locate(origin)
+        else:
+            lon, lat = float(request.GET['lon']), float(request.GET['lat'])
+
+        if 'radius' in request.GET:
+            radius_km = float(request.GET['radius'])
+            month = request.GET.get('month')
+            if month:
+                cities = nearby_comfort_cities(index, monthly_df, lon, lat, radius_km, month,
+                                               int(request.GET.get('min_days', 1)))
+            else:
+                names, distances = index.within_radius(lon, lat, radius_km)
+                cities = [{'city': name, 'distance_km': round(float(distance), 1)}
+                          for name, distance in zip(names.tolist(), distances.tolist())]
+            cities = [city for city in cities if city['city'] != origin]
+        else:
+            k = int(request.GET.get('k', 5))
+            names, distances = index.nearest(lon, lat, k + 1 if origin is not None else k)
+            cities = [{'city': name, 'distance_km': round(float(distance), 1)}
+                      for name, distance in zip(names.tolist(), distances.tolist())
+                      if name != origin][:k]
+    except KeyError as e:
+        if origin is not None:
+            raise Http404(str(e))
+        return HttpResponseBadRequest(f"Missing parameter: {e}")
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    return JsonResponse({'lon': lon, 'lat': lat, 'cities': cities},
+                        json_dumps_params={'ensure_ascii': False})
+
+def _load_climate_index(path):
+    from processor.process_climate_similarity import ClimateFeatureProcessor
+    return ClimateFeatureProcessor().load_index()
+
+async def similar_cities_view(request):
+    monthly_path = settings.BASE_DIR.parent / 'database' / 'monthly_data.csv'
+    if not monthly_path.exists():
+        raise Http404("Monthly data has not been built")
+    # 以月度数据为版本键：月度数据更新后自动重建特征矩阵
+    index = await acached_artifact(monthly_path, _load_climate_index)
+
+    city = request.GET.get('city')
+    if not city:
+        return HttpResponseBadRequest("Missing parameter: 'city'")
+    metric = request.GET.get('metric', 'cosine')
+    try:
+        cities = index.similar_records(city, int(request.GET.get('k', 5)), metric)
+    except KeyError as e:
+        raise Http404(str(e))
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    return JsonResponse({'city': city, 'metric': metric, 'cities': cities},
+                        json_dumps_params={'ensure_ascii': False})
+
+async def comfort_cities_view(request, month):
+    if not re.fullmatch(r'\d{4}-\d{2}', month):
+        return HttpResponseBadRequest(f"Invalid month: {month}")
+    shard_path = settings.BASE_DIR.parent / 'database' / 'comfort_cities' / f'{month}.json'
+    if not shard_path.exists():
+        raise Http404(f"No comfort cities for month: {month}")
+    # 分片已是紧凑JSON，直接返回文件内容
+    return HttpResponse(await run_blocking(shard_path.read_bytes), content_type='application/json; charset=utf-8')
+
+async def weather_cube_view(request):
+    from processor.process_weather_cube import WeatherCubeProcessor, WeatherCube
+
+    cube_path = WeatherCubeProcessor().cube_path
+    if not cube_path.exists():
+        raise Http404("Weather cube has not been built")
+    cube = await acached_artifact(cube_path, WeatherCube)
+
+    level = request.GET.get('level', 'province')
+    measure = request.GET.get('measure', 'days')
+    try:
+        records = cube.query(
+            measure=measure,
+            level=level,
+            group_by=_list_param(request, 'group_by'),
+            months=_list_param(request, 'months'),
+            entities=_list_param(request, 'entities'),
+            weather=_list_param(request, 'weather'),
+            comfort=_list_param(request, 'comfort'),
+            wind=_list_param(request, 'wind'),
+        )
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    return JsonResponse({'level': level, 'measure': measure, 'records': records},
+                        json_dumps_params={'ensure_ascii': False})
+
+# 城市日序列：各指标按目标点数降采样后返回
+SERIES_METRICS = ['最高温', '最低温', '平均温度', '空气质量指数', '风力']
+SERIES_MAX_POINTS = 5000
+
+def _city_series(city, metrics, points, method):
+    from processor.process_city_index import CityIndexProcessor
+    from analysis.render_primitives import downsample_indices
+
+    df = CityIndexProcessor().load_city(city)
+    if df.empty:
+        raise LookupError(f"No daily data for city: {city}")
+    df = df.sort_values('日期', kind='stable', ignore_index=True)
+    dates = df['日期'].to_numpy()
+    labels = df['日期'].dt.strftime('%Y-%m-%d').to_numpy()
+    series = {}
+    for metric in metrics:
+        values = df[metric].to_numpy(dtype=float)
+        positions = downsample_indices(dates, values, points, method)
+        series[metric] = {'dates': labels[positions].tolist(), 'values': values[positions].tolist()}
+    return {'city': city, 'method': method, 'points': points, 'total': len(df), 'series': series}
+
+async def city_series_view(request):
+    city = request.GET.get('city')
+    if not city:
+        return HttpResponseBadRequest("Missing parameter: 'city'")
+    metrics = _list_param(request, 'metrics') or ['最高温', '最低温']
+    unknown = [metric for metric in metrics if metric not in SERIES_METRICS]
+    if unknown:
+        return HttpResponseBadRequest(f"Unknown metrics: {unknown}. Available: {SERIES_METRICS}")
+    try:
+        points = int(request.GET.get('points', 500))
+        if not 3 <= points <= SERIES_MAX_POINTS:
+            raise ValueError(f"points must be between 3 and {SERIES_MAX_POINTS}")
+        data = await run_blocking(_city_series, city, metrics, points, request.GET.get('method', 'lttb'))
+    except LookupError as e:
+        raise Http404(str(e))
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    return JsonResponse(data, json_dumps_params={'ensure_ascii': False})
+
+def _map_data():
+    return WeatherVisualizer().get_map_data()
+
+async def map_data_view(request):
+    return JsonResponse(await run_blocking(_map_data), json_dumps_params={'ensure_ascii': False})
+
+# 数据版本推送：轮询版本文件的修改时间，空闲时定期发送注释行保持连接
+DATA_EVENTS_POLL_SECONDS = 1.0
+DATA_EVENTS_KEEPALIVE_SECONDS = 15.0
+# WSGI 下每个连接占用一个服务器线程：流在一段时间后结束，由浏览器按 retry 间隔重连
+# （重连后首条消息为当前版本，页面忽略已处理过的版本）
+DATA_EVENTS_SYNC_MAX_POLLS = 60
+DATA_EVENTS_RETRY_MS = 5000
+
+class _DataVersionEvents:
+    """Server-sent event chunks for changes of the data version file"""
+
+    def __init__(self, version_path):
+        self.version_path = version_path
+        self.last_mtime = None
+        self.last_sent = time.monotonic()
+
+    def poll(self):
+        from processor.data_watch import read_data_version
+
+        chunks = []
+        mtime = self.version_path.stat().st_mtime_ns if self.version_path.exists() else None
+        if mtime != self.last_mtime:
+            self.last_mtime = mtime
+            record = read_data_version(self.version_path)
+            if record is not None:
+                chunks.append(f"id: {record['version']}\nevent: data-version\n"
+                              f"data: {json.dumps(record, ensure_ascii=False)}\n\n")
+        if not chunks and time.monotonic() - self.last_sent >= DATA_EVENTS_KEEPALIVE_SECONDS:
+            chunks.append(': keep-alive\n\n')
+        if chunks:
+            self.last_sent = time.monotonic()
+        return chunks
+
+def _data_version_events(version_path):
+    events = _DataVersionEvents(version_path)
+    yield f'retry: {DATA_EVENTS_RETRY_MS}\n\n'
+    for _ in range(DATA_EVENTS_SYNC_MAX_POLLS):
+        yield from events.poll()
+        time.sleep(DATA_EVENTS_POLL_SECONDS)
+
+async def _async_data_version_events(version_path):
+    events = _DataVersionEvents(version_path)
+    yield f'retry: {DATA_EVENTS_RETRY_MS}\n\n'
+    while True:
+        for chunk in events.poll():
+            yield chunk
+        await asyncio.sleep(DATA_EVENTS_POLL_SECONDS)
+
+async def data_events_view(request):
+    version_path = settings.BASE_DIR.parent / 'database' / 'data_version.json'
+    # ASGI 下用异步生成器，连接等待时不占用线程；WSGI 开发服务器仍用同步生成器
+    if isinstance(request, ASGIRequest):
+        stream = _async_data_version_events(version_path)
+    else:
+        stream = _data_version_events(version_path)
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1 +1 @@
-# Empty file is fine
+# Empty file is fine
@@ -0,0 +1,142 @@
+import json
+import threading
+from collections import OrderedDict
+
+from processor.process_city_index import CityIndexProcessor
+from visualize.data_cache import cached_artifact
+
+CONTENT_TYPES = {
+    'full': 'image/png',
+    'thumbnail': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+def _analyzer_class():
+    """Import the analyzer (and matplotlib) only when a chart is first requested"""
+    import matplotlib
+    matplotlib.use('Agg')
+    from analysis.city_weather_analysis import WeatherAnalyzer
+    return WeatherAnalyzer
+
+def _load_manifest(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+class AnalysisImageService:
+    """Render per-city analysis charts on demand for the web tier.
+
+    Images are rendered lazily on first request through ``WeatherAnalyzer``,
+    which keeps its own fingerprinted on-disk cache. Recently served images are
+    held in a bounded in-memory LRU, the on-disk cache is pruned to
+    ``max_disk_entries`` and concurrent requests for the same image wait on a
+    single render instead of starting their own. The in-memory entries are
+    keyed by the daily data the city index was built from and are dropped
+    when the pipeline reruns.
+    """
+
+    def __init__(self, max_items=64, max_bytes=128 * 1024 * 1024, max_disk_entries=600):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.max_disk_entries = max_disk_entries
+        self.city_index = CityIndexProcessor()
+
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._source = None
+        # 城市索引过期时只允许一个请求重建
+        self._index_lock = threading.Lock()
+        # pyplot 的全局状态不是线程安全的，渲染需串行执行
+        self._render_lock = threading.Lock()
+
+    def get_image(self, city_name, panel='all', variant='full'):
+        """Return (image bytes, content type) for a city's chart"""
+        if variant not in CONTENT_TYPES:
+            raise ValueError(f"Unknown image variant: {variant}")
+        if panel != 'all' and panel not in _analyzer_class().PANELS:
+            raise ValueError(f"Unknown analysis panel: {panel}")
+        manifest = self._city_manifest()
+        if city_name not in manifest['cities']:
+            raise LookupError(f"No weather data for city: {city_name}")
+
+        source = (manifest['source']['size'], manifest['source']['mtime_ns'])
+        key = (city_name, panel, variant, source)
+        with self._lock:
+            if source != self._source:
+                # 数据已更新，旧图片不再返回
+                self._memory.clear()
+                self._memory_bytes = 0
+                self._source = source
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key], CONTENT_TYPES[variant]
+            flight = self._inflight.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = {'event': threading.Event(), 'result': None, 'error': None}
+                self._inflight[key] = flight
+
+        if not is_leader:
+            flight['event'].wait()
+            if flight['error'] is not None:
+                raise flight['error']
+            return flight['result'], CONTENT_TYPES[variant]
+
+        try:
+            image = self._render(city_name, panel, variant)
+            flight['result'] = image
+            self._remember(key, image)
+            return image, CONTENT_TYPES[variant]
+        except Exception as e:
+            flight['error'] = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight['event'].set()
+
+    def _city_manifest(self):
+        """Manifest of the current city index, rebuilt under a lock when the daily data changed"""
+        index = self.city_index
+        with self._index_lock:
+            if index.manifest_path.exists() and index.daily_data_path.exists():
+                manifest = cached_artifact(index.manifest_path, _load_manifest)
+                if manifest.get('source') == index.source_signature():
+                    return manifest
+            index.build_index()
+            return cached_artifact(index.manifest_path, _load_manifest)
+
+    def _render(self, city_name, panel, variant):
+        """Render (or load from the disk cache) a single chart"""
+        with self._render_lock:
+            analyzer = _analyzer_class()(city_name)
+            if panel == 'all':
+                paths = analyzer.create_analysis(variants=(variant,))
+            else:
+                paths = analyzer.create_panel(panel, variants=(variant,))
+            analyzer.chart_cache.prune(self.max_disk_entries)
+        return paths[variant].read_bytes()
+
+    def _remember(self, key, image):
+        """Insert an image into the in-memory LRU and evict old entries"""
+        with self._lock:
+            if key in self._memory:
+                self._memory_bytes -= len(self._memory.pop(key))
+            self._memory[key] = image
+            self._memory_bytes += len(image)
+            while self._memory and (len(self._memory) > self.max_items
+                                    or self._memory_bytes > self.max_bytes):
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_image_service():
+    """Process-wide image service shared by all request threads"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = AnalysisImageService()
+        return _service
@@ -0,0 +1,91 @@
+import os
+import asyncio
+import threading
+from functools import partial
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# 阻塞操作的有界线程池：产物加载与视图中的其他阻塞工作分开，
+# 等待加载结果的视图线程不会占满加载线程池而相互等待
+LOAD_WORKERS = 4
+BLOCKING_WORKERS = 8
+
+_cache = {}
+_inflight = {}
+_lock = threading.Lock()
+_load_executor = ThreadPoolExecutor(max_workers=LOAD_WORKERS, thread_name_prefix='artifact-load')
+_blocking_executor = ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix='view-blocking')
+
+def _cache_key(path, loader):
+    # 同一文件可由不同的加载函数加载为不同对象
+    return str(path), loader.__module__, loader.__qualname__
+
+def _claim(path, loader):
+    """Cached value or shared in-flight load of an artifact
+
+    Returns ``(future, mtime_ns)``. Only the first caller after a miss gets
+    the file's mtime back and must run the load; other callers get None, and
+    concurrent callers for the same file version share the same future.
+    """
+    key = _cache_key(path, loader)
+    mtime_ns = os.stat(path).st_mtime_ns
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] == mtime_ns:
+            future = Future()
+            future.set_result(entry[1])
+            return future, None
+        pending = _inflight.get(key)
+        if pending is not None and pending[0] == mtime_ns:
+            return pending[1], None
+        future = Future()
+        _inflight[key] = (mtime_ns, future)
+        return future, mtime_ns
+
+def _release(key, future):
+    # 加载期间文件可能已更新并发起了新的加载，只移除自己的登记
+    if _inflight.get(key, (None, None))[1] is future:
+        del _inflight[key]
+
+def _load(path, loader, future, mtime_ns):
+    """Run a claimed load and publish the result (or error) to every waiter"""
+    key = _cache_key(path, loader)
+    if not future.set_running_or_notify_cancel():
+        with _lock:
+            _release(key, future)
+        return
+    try:
+        value = loader(str(path))
+    except BaseException as e:
+        with _lock:
+            _release(key, future)
+        future.set_exception(e)
+        return
+    with _lock:
+        _cache[key] = (mtime_ns, value)
+        _release(key, future)
+    future.set_result(value)
+
+def cached_artifact(path, loader):
+    """Load a pipeline artifact once per process and reload it when the file changes
+
+    Entries are keyed by path and loader and invalidated by the file's mtime,
+    so long-running web workers pick up a rerun of the pipeline without a
+    restart. Concurrent misses for the same file coalesce into one load.
+    """
+    future, mtime_ns = _claim(path, loader)
+    if mtime_ns is not None:
+        _load(path, loader, future, mtime_ns)
+    return future.result()
+
+async def acached_artifact(path, loader):
+    """Async ``cached_artifact``: a miss is loaded on the bounded load executor"""
+    future, mtime_ns = _claim(path, loader)
+    if mtime_ns is not None:
+        _load_executor.submit(_load, path, loader, future, mtime_ns)
+    # 共享的加载结果不随单个请求取消（如客户端断开）而取消，其他等待者照常得到结果
+    return await asyncio.shield(asyncio.wrap_future(future))
+
+async def run_blocking(func, *args, **kwargs):
+    """Run blocking work (file reads, pandas, rendering) on the bounded executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_blocking_executor, partial(func, *args, **kwargs))
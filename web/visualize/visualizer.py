@@ -1,7 +1,7 @@
 from django.shortcuts import render
 import json
 import os
-import pandas as pd
+from visualize.data_cache import cached_artifact
 
 class WeatherVisualizer:
     def __init__(self):
@@ -18,16 +18,30 @@ class WeatherVisualizer:
             self.data = json.load(f)
         print(f"Loaded statistics keys: {list(self.data.keys())}")
     
+    def open_store(self, table):
+        """Memory-mapped column store of a pipeline table, published from its CSV if missing"""
+        from processor.column_store import ColumnStore, publish_column_store
+        store_dir = os.path.join(self.base_dir, 'database', 'column_store', table)
+        pointer_path = os.path.join(store_dir, 'current.json')
+        if not os.path.exists(pointer_path):
+            import pandas as pd
+            print(f"Publishing column store for {table}")
+            publish_column_store(pd.read_csv(os.path.join(self.base_dir, 'database', f'{table}.csv')), store_dir)
+        return cached_artifact(pointer_path, lambda path: ColumnStore(os.path.dirname(path)))
+
     def get_top_comfort_cities(self):
         print("\n=== Getting Top Comfort Cities ===")
-        yearly_data = pd.read_csv(os.path.join(self.base_dir, 'database', 'yearly_data.csv'))
-        print(f"Loaded yearly data shape: {yearly_data.shape}")
+        import numpy as np
+        yearly_data = self.open_store('yearly_data')
+        print(f"Mapped yearly data rows: {len(yearly_data)}")
         
-        top_cities = yearly_data.nlargest(10, '舒适天数')[['城市', '省份', '舒适天数']]
+        # 稳定排序，并列时保留原始顺序（与 nlargest 一致）
+        comfort_days = yearly_data.array('舒适天数')
+        top_rows = np.argsort(-comfort_days, kind='stable')[:10]
         result = {
-            'cities': top_cities['城市'].tolist(),
-            'provinces': top_cities['省份'].tolist(),
-            'values': top_cities['舒适天数'].tolist()
+            'cities': yearly_data.values('城市', top_rows).tolist(),
+            'provinces': yearly_data.values('省份', top_rows).tolist(),
+            'values': comfort_days[top_rows].tolist()
         }
         print("Top 10 cities data:")
         for city, province, value in zip(result['cities'], result['provinces'], result['values']):
@@ -36,12 +50,17 @@ class WeatherVisualizer:
         
     def get_map_data(self):
         print("\n=== Getting Map Data ===")
-        monthly_data = pd.read_csv(os.path.join(self.base_dir, 'database', 'monthly_data.csv'))
-        print(f"Loaded monthly data shape: {monthly_data.shape}")
+        import numpy as np
+        monthly_data = self.open_store('monthly_data')
+        print(f"Mapped monthly data rows: {len(monthly_data)}")
+        month_codes = monthly_data.array('年月')
+        province_codes = monthly_data.array('省份')
+        comfort_days = monthly_data.array('舒适天数')
+        provinces = monthly_data.dictionary('省份').tolist()
         
-        # 读取舒适城市数据
-        with open(os.path.join(self.base_dir, 'database', 'comfort_cities.json'), 'r', encoding='utf-8') as f:
-            comfort_cities = json.load(f)
+        # 读取舒适城市分片索引（各月点数据由前端按需请求）
+        with open(os.path.join(self.base_dir, 'database', 'comfort_cities', 'index.json'), 'r', encoding='utf-8') as f:
+            comfort_months = json.load(f)['calendar']
         
         # 定义所有省份和直辖市列表
         all_provinces = [
@@ -59,17 +78,19 @@ class WeatherVisualizer:
         
         # 处理每个月的数据
         for month in range(1, 13):
-            # 特殊处理12月数据
-            if month == 12:
-                month_str = "2023-12"
-            else:
-                month_str = f"2024-{month:02d}"
+            # 自然月对应数据中最近一年的年月
+            month_str = comfort_months.get(str(month))
             
             # 筛选当月数据
-            month_data = monthly_data[monthly_data['年月'] == month_str]
+            in_month = (month_codes == monthly_data.code_of('年月', month_str)) & (province_codes >= 0)
             
             # 计算每个省份的平均舒适天数
-            province_means = month_data.groupby('省份')['舒适天数'].mean().round(1)
+            counts = np.bincount(province_codes[in_month], minlength=len(provinces))
+            sums = np.bincount(province_codes[in_month], weights=comfort_days[in_month], minlength=len(provinces))
+            province_means = {
+                province: round(sums[i] / counts[i], 1)
+                for i, province in enumerate(provinces) if counts[i] > 0
+            }
             
             # 确保所有省份都有数据
             formatted_data = []
@@ -91,9 +112,15 @@ class WeatherVisualizer:
         
         return {
             'province_data': monthly_map_data,
-            'comfort_cities': comfort_cities
+            'comfort_months': comfort_months
         }
         
+    def get_data_version(self):
+        """Version of the published data the page is rendered from (0 before the first publish)"""
+        from processor.data_watch import read_data_version
+        record = read_data_version(os.path.join(self.base_dir, 'database', 'data_version.json'))
+        return record['version'] if record else 0
+
     def render_dashboard(self, request):
         print("\n=== Rendering Dashboard ===")
         context = {
@@ -113,6 +140,7 @@ class WeatherVisualizer:
             }, ensure_ascii=False),
             'map_data': json.dumps(self.get_map_data(), ensure_ascii=False),
             'top_comfort_cities': json.dumps(self.get_top_comfort_cities(), ensure_ascii=False),
+            'data_version': self.get_data_version(),
             'months': list(range(1, 13))
         }
         print("Context data prepared with keys:", list(context.keys()))